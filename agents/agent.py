@@ -1,37 +1,53 @@
 from typing import Iterator
-from agno.agent import Agent
-from agno.team import Team
-from agno.models.xai import xAI
-from agno.tools.duckduckgo import DuckDuckGoTools
+import compaction
+import ratelimit
+import registry
+import routing
+import tracing
 
-weather_agent = Agent(
-  name="Weather agent",
-  tools=[DuckDuckGoTools()],
-  role="Get the weather of a certain City",
-  instructions=["Use the DuckDuckGoTools to search the web for the weather in a given city."],
-  markdown=True,
-)
 
-live_search_agent = Agent(
-  name="Live search agent",
-  role="Live search for a given question",
-  model=xAI(id="grok-3",
-    search_parameters={
-      "mode": "on",
-      "max_search_results": 20,
-      "return_citations": False,
-    },
-  ),
-  markdown=True,
-)
+@registry.factory("agent.weather_agent")
+def build_weather_agent():
+  from agno.agent import Agent
+  from agno.tools.duckduckgo import DuckDuckGoTools
+  return Agent(
+    name="Weather agent",
+    tools=[DuckDuckGoTools()],
+    tool_hooks=[tracing.tool_hook, ratelimit.tool_hook],
+    **routing.route("weather.weather_agent"),
+    role="Get the weather of a certain City",
+    instructions=["Use the DuckDuckGoTools to search the web for the weather in a given city."],
+    markdown=True,
+  )
 
-team = Team(
-  members=[weather_agent, live_search_agent],
-  model=xAI(id="grok-3"),
-  instructions=["You are a team of agents that are tasked with things like finding the weather of a given city or a live search question."],
-  markdown=True,
-  show_members_responses=True,
-)
+
+@registry.factory("agent.live_search_agent")
+def build_live_search_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Live search agent",
+    role="Live search for a given question",
+    **routing.route("weather.live_search_agent"),
+    markdown=True,
+  )
+
+
+@registry.factory("agent.team")
+def build_team():
+  from agno.team import Team
+  return Team(
+    members=[registry.get("agent.weather_agent"), registry.get("agent.live_search_agent")],
+    **routing.route("weather.coordinator"),
+    instructions=["You are a team of agents that are tasked with things like finding the weather of a given city or a live search question."],
+    markdown=True,
+    post_hooks=[tracing.run_hook],
+    show_members_responses=True,
+    compression_manager=compaction.manager("weather"),
+  )
+
+
+# Agents, teams and members are module attributes too (agent.team), built on first access
+__getattr__ = registry.module_getattr("agent")
 
 def main():
   print("Welcome! Ask questions about weather, or anything else you want to know.")
@@ -50,7 +66,9 @@ def main():
         continue
 
       print()  # Add spacing
-      team.print_response(user_query, stream=True)
+      with tracing.trace_run("weather", question=user_query) as trace:
+        registry.get("agent.team").print_response(user_query, stream=True)
+      tracing.print_summary(trace)
       print("\n")  # Add spacing after response
 
     except KeyboardInterrupt:
@@ -0,0 +1,381 @@
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Offline benchmark for the agent pipelines. Recorded model turns and tool
+# payloads are replayed through a local stand-in server (an OpenAI-compatible
+# chat endpoint that every OpenRouter/xAI/OpenAI model is pointed at, plus the
+# CoinGecko routes), DDGS and Firecrawl are swapped for canned results, and each
+# team is driven end-to-end from the scripted details in benchmarks/*.json.
+# Nothing leaves the machine, so the numbers can gate regressions in CI.
+
+FIXTURES_DIR = Path(__file__).parent / "benchmarks"
+
+# Metrics compared against a baseline; a regression is any of these growing past the tolerance
+GATED_METRICS = ("p50_ms", "p90_ms", "model_turns", "tool_calls", "http_requests", "prompt_tokens")
+
+DELEGATION_TOOL = "delegate_task_to_member"
+
+# Stand-in credentials so the model and toolkit constructors don't refuse to load
+for _name in ("OPENROUTER_API_KEY", "XAI_API_KEY", "OPENAI_API_KEY", "FIRECRAWL_API_KEY"):
+  os.environ.setdefault(_name, "benchmark")
+os.environ["AGNO_TELEMETRY"] = "false"
+# Every iteration should do the same work, so the on-disk key statistics cache stays off
+os.environ["KEY_STATS_CACHE"] = "off"
+# Provider rate limits stay in this process and never throttle the replayed calls
+os.environ["RATE_LIMIT_DB"] = "memory"
+for _name in ("COINGECKO", "FIRECRAWL", "DDGS"):
+  os.environ[f"RATE_LIMIT_{_name}"] = "1000000/1"
+
+
+def estimate_tokens(value):
+  """Rough token count for a request or response body (4 characters per token)"""
+  text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+  return max(1, len(text) // 4)
+
+
+class FixtureServer:
+  """Local HTTP server replaying one fixture's model turns and HTTP payloads.
+
+  Chat completion requests are matched to a recorded script by a substring of
+  their system message; the step played is the number of assistant messages
+  already in the conversation. Every request is counted so a run can report its
+  model turns, tool calls and token volume.
+  """
+
+  def __init__(self):
+    self.fixture = {}
+    self._lock = threading.Lock()
+    self._calls = 0
+    self.reset()
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+          return self.do_GET()
+        message, latency = server.next_message(body)
+        time.sleep(latency)
+        usage = server.record_turn(body, message)
+        if body.get("stream"):
+          return self.send_stream(message, usage)
+        self.send_json(200, {
+          "id": "benchmark", "object": "chat.completion", "created": int(time.time()), "model": body.get("model", ""),
+          "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+          "usage": usage,
+        })
+
+      def do_GET(self):
+        payload = server.http_payload(urlsplit(self.path).path)
+        if payload is None:
+          return self.send_json(404, {"error": f"no fixture for {self.path}"})
+        self.send_json(200, payload)
+
+      def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+      def send_stream(self, message, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        delta = {"role": "assistant", "content": message.get("content")}
+        if message.get("tool_calls"):
+          delta["tool_calls"] = [dict(call, index=i) for i, call in enumerate(message["tool_calls"])]
+        chunk = {"id": "benchmark", "object": "chat.completion.chunk", "created": int(time.time()), "model": "benchmark"}
+        finish = "tool_calls" if message.get("tool_calls") else "stop"
+        for choices, extra in (([{"index": 0, "delta": delta, "finish_reason": None}], {}),
+                               ([{"index": 0, "delta": {}, "finish_reason": finish}], {"usage": usage})):
+          self.wfile.write(f"data: {json.dumps({**chunk, 'choices': choices, **extra})}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+      def log_message(self, *args):
+        pass
+
+    self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+    threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+  def reset(self):
+    """Zero the per-run counters"""
+    with self._lock:
+      self.counters = {"model_turns": 0, "tool_calls": 0, "delegations": 0, "http_requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "unmatched": 0}
+
+  def snapshot(self):
+    with self._lock:
+      return dict(self.counters)
+
+  def next_message(self, body):
+    """Pick the recorded assistant message for this request and the latency to apply"""
+    messages = body.get("messages") or []
+    system = "\n".join(str(m.get("content") or "") for m in messages if m.get("role") in ("system", "developer"))
+    rule = next((r for r in self.fixture.get("model", []) if r["match"] in system), None)
+    if rule is None:
+      with self._lock:
+        self.counters["unmatched"] += 1
+      step = {"content": "No recorded response for this request."}
+    else:
+      turn = sum(1 for m in messages if m.get("role") == "assistant")
+      step = rule["steps"][min(turn, len(rule["steps"]) - 1)]
+    latency = step.get("latency_ms", self.fixture.get("latency_ms", 0)) / 1000
+
+    message = {"role": "assistant", "content": step.get("content")}
+    if step.get("tool_calls"):
+      with self._lock:
+        start = self._calls
+        self._calls += len(step["tool_calls"])
+      message["tool_calls"] = [
+        {"id": f"call_{start + i}", "type": "function", "function": {"name": call["name"], "arguments": json.dumps(call.get("args", {}))}}
+        for i, call in enumerate(step["tool_calls"])
+      ]
+    return message, latency
+
+  def record_turn(self, body, message):
+    """Count the turn and return OpenAI-style usage for it"""
+    prompt = estimate_tokens({"messages": body.get("messages"), "tools": body.get("tools")})
+    completion = estimate_tokens({k: v for k, v in message.items() if v})
+    calls = [call["function"]["name"] for call in message.get("tool_calls") or []]
+    with self._lock:
+      self.counters["model_turns"] += 1
+      self.counters["delegations"] += sum(1 for name in calls if name == DELEGATION_TOOL)
+      self.counters["tool_calls"] += sum(1 for name in calls if name != DELEGATION_TOOL)
+      self.counters["prompt_tokens"] += prompt
+      self.counters["completion_tokens"] += completion
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+  def http_payload(self, path):
+    """Return the fixture payload for an API path, or None. The first segment names the mounted API (/coingecko, /firecrawl)."""
+    with self._lock:
+      self.counters["http_requests"] += 1
+    path = "/" + path.lstrip("/").partition("/")[2]
+    return self.fixture.get("http", {}).get(path)
+
+  def close(self):
+    self.httpd.shutdown()
+
+
+# Canned toolkit and DDGS results for the fixture being replayed
+_tool_payloads = {}
+_search_results = []
+
+
+def search_text(query, max_results=10, retries=None):
+  """Benchmark stand-in for clients.search_text"""
+  return _search_results[:max_results]
+
+
+def _tool_result(name):
+  payload = _tool_payloads.get(name)
+  if payload is None:
+    return "No results found."
+  return payload if isinstance(payload, str) else json.dumps(payload)
+
+
+def web_search(query: str, max_results: int = 5) -> str:
+  """Search the web (benchmark stand-in for DuckDuckGoTools.web_search)"""
+  return _tool_result("web_search")
+
+
+def search_news(query: str, max_results: int = 5) -> str:
+  """Search the news (benchmark stand-in for DuckDuckGoTools.search_news)"""
+  return _tool_result("search_news")
+
+
+TOOLKIT_STUBS = {stub.__name__: stub for stub in (web_search, search_news)}
+
+
+def team_agents(module):
+  """Every Agent/Team a team script registers, built now so they can be patched before the first run"""
+  from agno.agent import Agent
+  from agno.team import Team
+
+  import registry
+  return [value for value in registry.warm(module.__name__).values() if isinstance(value, (Agent, Team))]
+
+
+def patch_module(module, server):
+  """Point every model in a team script at the stand-in server and replace network toolkits with stubs"""
+  from agno.models.openai import OpenAIChat
+  from agno.tools import Toolkit
+
+  base_url = f"{server.url}/v1"
+  for agent in team_agents(module):
+    agent.telemetry = False
+    if agent.model is None:
+      agent.model = OpenAIChat(id="gpt-4o")
+    fallback_config = getattr(agent, "fallback_config", None)
+    fallbacks = (fallback_config.on_error + fallback_config.on_rate_limit) if fallback_config else []
+    for model in [agent.model, *fallbacks]:
+      model.base_url = base_url
+      model.api_key = "benchmark"
+      model.client = None
+      model.async_client = None
+    tools = []
+    for tool in getattr(agent, "tools", None) or []:
+      if isinstance(tool, Toolkit):
+        tools.extend(TOOLKIT_STUBS[f.__name__] for f in tool.tools if f.__name__ in TOOLKIT_STUBS)
+      else:
+        tools.append(tool)
+    if getattr(agent, "tools", None):
+      agent.tools = tools
+  import clients
+  clients.search_text = search_text
+  if hasattr(module, "COINGECKO_BASE"):
+    module.COINGECKO_BASE = f"{server.url}/coingecko"
+  if hasattr(module, "keystats"):
+    module.keystats.FIRECRAWL_API_URL = f"{server.url}/firecrawl"
+
+
+def load_fixtures(directory=FIXTURES_DIR):
+  """Load every fixture file: {team: fixture}"""
+  fixtures = {}
+  for path in sorted(Path(directory).glob("*.json")):
+    fixture = json.loads(path.read_text())
+    fixtures[fixture["team"]] = fixture
+  return fixtures
+
+
+def run_scenario(module, scenario):
+  """Drive one scenario end-to-end and return the final report text"""
+  parallel = scenario.get("mode") == "parallel"
+  if module.__name__ == "crypto":
+    return module.run_analysis(scenario["details"], parallel=parallel)
+  if module.__name__ == "travel":
+    return module.run_plan(scenario["details"], parallel=parallel)
+  if module.__name__ == "stocks":
+    return module.run_analysis(scenario["query"])
+  return module.team.run(scenario["query"]).content
+
+
+def reset_caches():
+  """Drop in-process caches so every iteration does the same work"""
+  import search
+  search.search_cache.clear()
+  keystats = sys.modules.get("keystats")
+  if keystats is not None:
+    keystats.key_stats_cache.clear()
+  crypto = sys.modules.get("crypto")
+  if crypto is not None:
+    crypto.market_cache.clear()
+    crypto.ohlc_cache.clear()
+
+
+def percentile(values, pct):
+  """Linear-interpolated percentile of a non-empty list"""
+  values = sorted(values)
+  rank = (len(values) - 1) * pct / 100
+  low = int(rank)
+  high = min(low + 1, len(values) - 1)
+  return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def bench(server, module, fixture, scenario, iterations, warmup):
+  """Run a scenario warmup + iterations times and summarize latency and per-run counters"""
+  server.fixture = fixture
+  _tool_payloads.clear()
+  _tool_payloads.update(fixture.get("tools", {}))
+  _search_results[:] = fixture.get("search", [])
+  timings, counters = [], []
+  for i in range(warmup + iterations):
+    reset_caches()
+    server.reset()
+    start = time.perf_counter()
+    report = run_scenario(module, scenario)
+    elapsed = (time.perf_counter() - start) * 1000
+    snapshot = server.snapshot()
+    if not report:
+      raise RuntimeError(f"{scenario['name']}: run returned no report")
+    if snapshot.pop("unmatched"):
+      raise RuntimeError(f"{scenario['name']}: model request with no recorded response; update the fixture")
+    if i >= warmup:
+      timings.append(elapsed)
+      counters.append(snapshot)
+  result = {
+    "scenario": scenario["name"],
+    "runs": iterations,
+    "p50_ms": round(percentile(timings, 50), 1),
+    "p90_ms": round(percentile(timings, 90), 1),
+    "p99_ms": round(percentile(timings, 99), 1),
+    "mean_ms": round(sum(timings) / len(timings), 1),
+  }
+  for key in counters[0]:
+    result[key] = round(sum(c[key] for c in counters) / len(counters), 1)
+  return result
+
+
+def compare(results, baseline, tolerance):
+  """Return a list of regression messages for results that exceed baseline by more than tolerance"""
+  previous = {row["scenario"]: row for row in baseline}
+  regressions = []
+  for row in results:
+    before = previous.get(row["scenario"])
+    if before is None:
+      continue
+    for metric in GATED_METRICS:
+      if metric in before and row[metric] > before[metric] * (1 + tolerance):
+        regressions.append(f"{row['scenario']}: {metric} {before[metric]} -> {row[metric]}")
+  return regressions
+
+
+def format_table(results):
+  """Render results as a plain-text table"""
+  columns = ("scenario", "runs", "p50_ms", "p90_ms", "p99_ms", "mean_ms", "model_turns", "tool_calls",
+             "delegations", "http_requests", "prompt_tokens", "completion_tokens")
+  rows = [[str(row[c]) for c in columns] for row in results]
+  widths = [max(len(c), *(len(r[i]) for r in rows)) if rows else len(c) for i, c in enumerate(columns)]
+  lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+  lines += ["  ".join(v.ljust(w) for v, w in zip(row, widths)) for row in rows]
+  return "\n".join(lines)
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Offline benchmark for the agent teams using recorded fixtures")
+  parser.add_argument("scenarios", nargs="*", help="Scenario names to run (default: all)")
+  parser.add_argument("--fixtures", default=str(FIXTURES_DIR), help="Directory of fixture JSON files")
+  parser.add_argument("--iterations", type=int, default=5, help="Measured runs per scenario")
+  parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per scenario before timing")
+  parser.add_argument("--json", action="store_true", help="Print results as JSON instead of a table")
+  parser.add_argument("--save", help="Write results as JSON to this file")
+  parser.add_argument("--baseline", help="Compare against results saved with --save and exit 1 on regression")
+  parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed growth over the baseline (default: 0.2 = 20%%)")
+  args = parser.parse_args()
+
+  fixtures = load_fixtures(args.fixtures)
+  server = FixtureServer()
+  results = []
+  try:
+    for team_name, fixture in fixtures.items():
+      scenarios = [s for s in fixture["scenarios"] if not args.scenarios or s["name"] in args.scenarios]
+      if not scenarios:
+        continue
+      module = importlib.import_module(team_name)
+      patch_module(module, server)
+      for scenario in scenarios:
+        results.append(bench(server, module, fixture, scenario, args.iterations, args.warmup))
+  finally:
+    server.close()
+
+  print(json.dumps(results, indent=2) if args.json else format_table(results))
+  if args.save:
+    Path(args.save).write_text(json.dumps(results, indent=2) + "\n")
+  if args.baseline:
+    regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+    if regressions:
+      print("\nRegressions:\n" + "\n".join(regressions), file=sys.stderr)
+      sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+
+import tracing
+
+
+class _Flight:
+  """A fetch in progress that other callers can wait on"""
+
+  def __init__(self):
+    self.done = threading.Event()
+    self.error = None
+
+
+class TTLCache:
+  """Thread-safe LRU cache with per-entry TTL and single-flight loading.
+
+  Concurrent lookups for the same missing key share one loader call. Counters
+  for hits, misses (one per key fetched), coalesced lookups (waited on another
+  caller's fetch) and stale entries are available through stats().
+  """
+
+  def __init__(self, ttl=60.0, maxsize=256):
+    self.ttl = ttl
+    self.maxsize = maxsize
+    self._data = OrderedDict()
+    self._flights = {}
+    self._lock = threading.Lock()
+    self._hits = 0
+    self._misses = 0
+    self._coalesced = 0
+    self._stale = 0
+
+  def _lookup(self, key, now):
+    """Return (found, value) for key; caller must hold the lock"""
+    entry = self._data.get(key)
+    if entry is None:
+      return False, None
+    value, expires = entry
+    if expires <= now:
+      del self._data[key]
+      self._stale += 1
+      return False, None
+    self._data.move_to_end(key)
+    return True, value
+
+  def _store(self, key, value, now, ttl=None):
+    """Insert key and evict least recently used entries; caller must hold the lock"""
+    self._data[key] = (value, now + (self.ttl if ttl is None else ttl))
+    self._data.move_to_end(key)
+    while len(self._data) > self.maxsize:
+      self._data.popitem(last=False)
+
+  def get(self, key, default=None):
+    """Return the cached value for key, or default if missing or expired"""
+    with self._lock:
+      found, value = self._lookup(key, time.monotonic())
+      if found:
+        self._hits += 1
+        return value
+      self._misses += 1
+      return default
+
+  def __contains__(self, key):
+    """Whether key holds an unexpired value; doesn't count as a hit or miss or refresh its LRU position"""
+    with self._lock:
+      entry = self._data.get(key)
+      return entry is not None and entry[1] > time.monotonic()
+
+  def set(self, key, value, ttl=None):
+    """Store value under key, for ttl seconds instead of the cache's TTL if given"""
+    with self._lock:
+      self._store(key, value, time.monotonic(), ttl)
+
+  def get_many(self, keys, loader):
+    """Return {key: value} for keys, calling loader(missing_keys) once for keys not cached.
+
+    loader must return a dict; keys it leaves out are not cached and are absent
+    from the result. Keys already being loaded by another thread are waited on
+    instead of fetched again.
+    """
+    results = {}
+    owned = []
+    waiting = {}
+    with self._lock:
+      now = time.monotonic()
+      for key in dict.fromkeys(keys):
+        found, value = self._lookup(key, now)
+        if found:
+          self._hits += 1
+          results[key] = value
+          continue
+        flight = self._flights.get(key)
+        if flight is None:
+          self._misses += 1
+          flight = self._flights[key] = _Flight()
+          owned.append(key)
+        else:
+          self._coalesced += 1
+          waiting[key] = flight
+    # A lookup that waits on another caller's fetch costs no request, so traces count it as a hit
+    tracing.incr("cache_hits", len(results) + len(waiting))
+    tracing.incr("cache_misses", len(owned))
+
+    if owned:
+      try:
+        loaded = loader(owned)
+      except BaseException as e:
+        self._finish(owned, {}, e)
+        raise
+      self._finish(owned, loaded, None)
+      results.update({k: loaded[k] for k in owned if k in loaded})
+
+    for key, flight in waiting.items():
+      flight.done.wait()
+      if flight.error is not None:
+        raise flight.error
+      with self._lock:
+        entry = self._data.get(key)
+      if entry is not None:
+        results[key] = entry[0]
+    return results
+
+  def _finish(self, keys, loaded, error):
+    """Store loaded values and wake threads waiting on keys"""
+    with self._lock:
+      now = time.monotonic()
+      for key in keys:
+        if error is None and key in loaded:
+          self._store(key, loaded[key], now)
+        flight = self._flights.pop(key)
+        flight.error = error
+        flight.done.set()
+
+  def clear(self):
+    """Drop all cached entries"""
+    with self._lock:
+      self._data.clear()
+
+  def stats(self):
+    """Return hit/miss/coalesced/stale counters and current size"""
+    with self._lock:
+      return {
+        "hits": self._hits,
+        "misses": self._misses,
+        "coalesced": self._coalesced,
+        "stale": self._stale,
+        "size": len(self._data),
+        "maxsize": self.maxsize,
+        "ttl": self.ttl,
+      }
@@ -0,0 +1,145 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import ratelimit
+import tracing
+
+# Shared outbound clients for agent tools. One pooled keep-alive requests.Session
+# and one DDGS instance per thread are reused across calls so tools don't pay a
+# new TCP+TLS handshake per request, and 429/5xx responses are retried with
+# bounded exponential backoff instead of failing immediately. Calls to a
+# scheduled provider first wait for capacity in ratelimit.py, and a 429 from it
+# holds the provider's bucket and queues the call again instead of using up a
+# retry.
+
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "8"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_session():
+  """Return the shared pooled requests.Session"""
+  global _session
+  if _session is None:
+    with _session_lock:
+      if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+  return _session
+
+
+def retry_after_seconds(response):
+  """Parse a Retry-After header (seconds or HTTP date), or None if absent"""
+  value = response.headers.get("Retry-After") if response is not None else None
+  if not value:
+    return None
+  try:
+    return max(0.0, float(value))
+  except ValueError:
+    pass
+  try:
+    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+  except (TypeError, ValueError):
+    return None
+
+
+def backoff_delay(attempt, retry_after=None):
+  """Delay before retry number attempt (0-based): Retry-After if given, else exponential with full jitter"""
+  if retry_after is not None:
+    return min(retry_after, BACKOFF_MAX)
+  return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(method, url, retries=None, provider=None, **kwargs):
+  """Send an HTTP request on the shared session, retrying 429/5xx and connection errors.
+
+  With a provider ("coingecko", "firecrawl"), every attempt waits for the
+  provider's rate limit first and 429s are retried until ratelimit.MAX_WAIT.
+  """
+  retries = MAX_RETRIES if retries is None else retries
+  kwargs.setdefault("timeout", 10)
+  session = get_session()
+  parts = urlsplit(url)
+  deadline = time.monotonic() + ratelimit.MAX_WAIT
+  with tracing.span(f"{method} {parts.netloc}{parts.path}", kind="http"):
+    attempt = 0
+    while True:
+      ratelimit.acquire(provider, deadline)
+      try:
+        response = session.request(method, url, **kwargs)
+      except (requests.ConnectionError, requests.Timeout):
+        if attempt >= retries:
+          raise
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+        tracing.incr("retries")
+        continue
+      if response.status_code == 429 and ratelimit.rate_limited(provider, retry_after_seconds(response)):
+        tracing.incr("rate_limited")
+        continue
+      if response.status_code not in RETRY_STATUSES or attempt >= retries:
+        tracing.annotate(status=response.status_code, bytes=len(response.content))
+        response.raise_for_status()
+        return response
+      time.sleep(backoff_delay(attempt, retry_after_seconds(response)))
+      attempt += 1
+      tracing.incr("retries")
+
+
+def get_json(url, params=None, headers=None, retries=None, timeout=10, provider=None):
+  """GET url on the shared session and return the decoded JSON body"""
+  return request("GET", url, retries=retries, provider=provider, params=params, headers=headers, timeout=timeout).json()
+
+
+def get_ddgs():
+  """Return this thread's reusable DDGS instance"""
+  ddgs = getattr(_local, "ddgs", None)
+  if ddgs is None:
+    from ddgs import DDGS
+    ddgs = _local.ddgs = DDGS()
+  return ddgs
+
+
+def search_text(query, max_results=10, retries=None):
+  """Run a DDGS text search within the ddgs rate limit, queueing again when rate limited and retrying timeouts"""
+  from ddgs.exceptions import RatelimitException, TimeoutException
+
+  retries = MAX_RETRIES if retries is None else retries
+  deadline = time.monotonic() + ratelimit.MAX_WAIT
+  with tracing.span("ddgs.text", kind="search", query=query):
+    attempt = 0
+    while True:
+      ratelimit.acquire("ddgs", deadline)
+      try:
+        results = get_ddgs().text(query=query, max_results=max_results)
+        tracing.annotate(results=len(results or []))
+        return results
+      except RatelimitException:
+        if ratelimit.rate_limited("ddgs", min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))):
+          tracing.incr("rate_limited")
+          attempt += 1
+          continue
+        if attempt >= retries:
+          raise
+      except TimeoutException:
+        if attempt >= retries:
+          raise
+      time.sleep(backoff_delay(attempt))
+      attempt += 1
+      tracing.incr("retries")
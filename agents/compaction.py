@@ -0,0 +1,233 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+import tracing
+
+# Compaction between team members and whoever merges their results. The
+# coordinator (team mode) and the synthesis agent (--parallel) are the slowest
+# calls of a run and their latency grows with input tokens, so every member
+# result is cut to a per-member token budget before they see it: boilerplate
+# (disclaimers, "let me know if...", intros, rules) and lines another member
+# already said are dropped, then what is left is trimmed section by section so
+# every heading keeps its first lines. JSON tool output keeps its structure
+# with long strings and lists shortened. Everything here is deterministic; no
+# model call is spent on summarizing. Members still print in full.
+
+# team -> tokens per member result; MEMBER_TOKEN_BUDGET_<TEAM> overrides, "off" disables
+DEFAULT_BUDGETS = {"crypto": 600, "travel": 800, "stocks": 800, "weather": 500}
+
+# Rough tokens for text of a given length; only used to size budgets, so no tokenizer is needed
+CHARS_PER_TOKEN = 4
+
+# Shortest line treated as repeated content when it appeared earlier; shorter ones are headings and labels
+MIN_REPEATED_LINE = 30
+
+_BOILERPLATE = re.compile(
+  r"not (?:financial|investment) advice|do your own research|\bdyor\b"
+  r"|consult (?:a|an|your) (?:licensed |qualified )?(?:financial|investment) (?:advisor|adviser|professional)"
+  r"|^(?:i )?hope (?:this|that) helps|let me know if|feel free to"
+  r"|^(?:sure|certainly|of course|great question)\b[,.!]"
+  r"|^(?:here is|here's|here are|below is|below are)\b.*:$"
+  r"|^[-*_=]{3,}$",
+  re.IGNORECASE,
+)
+_HEADING = re.compile(r"^(?:#{1,6}\s|\*\*[^*]+\*\*:?$)")
+
+
+def estimate_tokens(text):
+  """Approximate token count of text"""
+  return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def member_budget(team):
+  """Token budget per member result for team, or None when compaction is off"""
+  spec = os.getenv(f"MEMBER_TOKEN_BUDGET_{team.upper()}", str(DEFAULT_BUDGETS.get(team, 600)))
+  if spec.strip().lower() == "off":
+    return None
+  budget = int(spec)
+  if budget <= 0:
+    raise ValueError(f"invalid member token budget '{spec}' for {team}")
+  return budget
+
+
+def _normalize(line):
+  return re.sub(r"[\W_]+", " ", line).strip().lower()
+
+
+def strip_boilerplate(text, seen=None):
+  """Drop boilerplate lines, lines already in seen (normalized) and extra blank lines; adds kept lines to seen"""
+  seen = set() if seen is None else seen
+  kept = []
+  for line in text.splitlines():
+    line = line.rstrip()
+    stripped = line.strip()
+    if len(stripped) < 200 and _BOILERPLATE.search(stripped.strip("*_> ")):
+      continue
+    normalized = _normalize(stripped)
+    if len(normalized) >= MIN_REPEATED_LINE:
+      if normalized in seen:
+        continue
+      seen.add(normalized)
+    if not stripped and (not kept or not kept[-1]):
+      continue
+    kept.append(line)
+  while kept and not kept[-1]:
+    kept.pop()
+  return "\n".join(kept)
+
+
+def _shares(sizes, total):
+  """Split total characters over sections: small sections keep everything, large ones share the rest equally"""
+  shares = [0] * len(sizes)
+  remaining = total
+  pending = sorted(range(len(sizes)), key=lambda i: sizes[i])
+  while pending:
+    fair = remaining // len(pending)
+    i = pending.pop(0)
+    shares[i] = min(sizes[i], fair)
+    remaining -= shares[i]
+  return shares
+
+
+def _cut(lines, limit):
+  """Leading lines of a section within limit characters; the heading always stays and the last line may be cut at a word"""
+  kept, used = [], 0
+  for n, line in enumerate(lines):
+    if used + len(line) + 1 <= limit or (n == 0 and _HEADING.match(line.strip())):
+      kept.append(line)
+      used += len(line) + 1
+      continue
+    room = limit - used - 2
+    if room >= 40:
+      kept.append(line[:room].rsplit(" ", 1)[0] + " …")
+    break
+  return kept
+
+
+def truncate(text, budget):
+  """Cut text to about budget tokens, keeping the start of every markdown section"""
+  tokens = estimate_tokens(text)
+  if tokens <= budget:
+    return text
+  sections = []
+  for line in text.splitlines():
+    if not sections or _HEADING.match(line.strip()):
+      sections.append([])
+    sections[-1].append(line)
+  sizes = [sum(len(line) + 1 for line in section) for section in sections]
+  shares = _shares(sizes, budget * CHARS_PER_TOKEN)
+  kept = [line for section, share in zip(sections, shares) for line in _cut(section, share)]
+  return "\n".join(kept) + f"\n[compacted from ~{tokens} tokens]"
+
+
+def _shorten(value, limit):
+  if isinstance(value, str):
+    return value if len(value) <= limit else value[:limit].rsplit(" ", 1)[0] + " …"
+  if isinstance(value, list):
+    return [_shorten(item, limit) for item in value]
+  if isinstance(value, dict):
+    return {key: _shorten(item, limit) for key, item in value.items()}
+  return value
+
+
+def compact_json(text, budget):
+  """Shorten a JSON document to about budget tokens by trimming long strings, then trailing list items; None if text isn't JSON"""
+  try:
+    data = json.loads(text)
+  except ValueError:
+    return None
+  if not isinstance(data, (list, dict)):
+    return None
+  limit = 400
+  while True:
+    out = json.dumps(_shorten(data, limit), separators=(",", ":"), ensure_ascii=False)
+    if estimate_tokens(out) <= budget or limit <= 60:
+      break
+    limit //= 2
+  data = _shorten(data, limit)
+  dropped = 0
+  while isinstance(data, list) and len(data) > 1 and estimate_tokens(out) > budget:
+    data = data[:-1]
+    dropped += 1
+    out = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+  return out + (f"\n[{dropped} more results omitted]" if dropped else "")
+
+
+def compact(text, budget, seen=None):
+  """Compact one member result (or tool output) to about budget tokens"""
+  if budget is None or not text:
+    return text
+  if estimate_tokens(text) > budget:
+    compacted = compact_json(text.strip(), budget)
+    if compacted is not None:
+      return compacted
+  compacted = truncate(strip_boilerplate(text, seen), budget)
+  return compacted if len(compacted) < len(text) else text
+
+
+def compact_results(results, budget):
+  """{key: result} with each result's content compacted; lines one member already gave are dropped from the next"""
+  if budget is None:
+    return results
+  seen = set()
+  compacted = {key: {**result, "content": compact(result["content"], budget, seen)} for key, result in results.items()}
+  _record(sum(estimate_tokens(r["content"]) for r in results.values()), sum(estimate_tokens(r["content"]) for r in compacted.values()))
+  return compacted
+
+
+def _record(before, after):
+  """Record one compaction pass as a span of the current trace"""
+  with tracing.span("member results", kind="compaction", tokens_before=before, tokens_saved=before - after):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _manager_class():
+  from dataclasses import dataclass
+
+  from agno.compression.manager import CompressionManager
+
+  @dataclass
+  class CompactionManager(CompressionManager):
+    """agno CompressionManager that compacts every new tool result (member results included) without a model"""
+
+    budget: int = DEFAULT_BUDGETS["crypto"]
+
+    def should_compress(self, messages, tools=None, model=None, response_format=None):
+      return any(m.role == "tool" and m.compressed_content is None for m in messages)
+
+    async def ashould_compress(self, messages, tools=None, model=None, response_format=None):
+      return self.should_compress(messages)
+
+    def compress(self, messages, run_metrics=None):
+      tools = [m for m in messages if m.role == "tool"]
+      fresh = [m for m in tools if m.compressed_content is None]
+      if not fresh:
+        return
+      seen = set()
+      for message in tools:
+        if message.compressed_content is not None:
+          strip_boilerplate(message.compressed_content, seen)
+      before = after = 0
+      for message in fresh:
+        content = message.content if isinstance(message.content, str) else str(message.content or "")
+        message.compressed_content = compact(content, self.budget, seen)
+        before += estimate_tokens(content)
+        after += estimate_tokens(message.compressed_content)
+      self.stats["tool_results_compressed"] = self.stats.get("tool_results_compressed", 0) + len(fresh)
+      _record(before, after)
+
+    async def acompress(self, messages, run_metrics=None):
+      self.compress(messages, run_metrics)
+
+  return CompactionManager
+
+
+def manager(team):
+  """Team(compression_manager=...) value compacting member results to team's budget, or None when it's off"""
+  budget = member_budget(team)
+  if budget is None:
+    return None
+  return _manager_class()(compress_tool_results_limit=1, budget=budget)
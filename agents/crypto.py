@@ -1,58 +1,182 @@
+import argparse
+import asyncio
+import csv
 import json
 import os
+import sys
+import time
 from datetime import date
 from typing import Iterator
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.team import Team
-from agno.models.openrouter import OpenRouter
-import requests
-from ddgs import DDGS
+import clients
+import compaction
+import fanout
+import market
+import ratelimit
+import registry
+import result_cache
+import routing
+import session
+import search
+import streaming
+import tracing
+from cache import TTLCache
+from symbols import resolve_coin_id
 
 # Load environment variables from .env file
 load_dotenv()
 
 
-def get_coingecko_market_data(symbols: str) -> str:
-  """Fetch market data (price, market cap, 24h change) from CoinGecko. Pass comma-separated ticker symbols e.g. hype, btc, eth or HYPE, BTC, ETH (lowercased for API)."""
-  symbol_list = [s.strip().lower() for s in symbols.split(",") if s.strip()]
-  if not symbol_list:
-    return "Error: No symbols provided. Use ticker symbols e.g. hype, btc, eth."
-  base = "https://api.coingecko.com/api/v3"
-  params = {"vs_currency": "usd", "symbols": ",".join(symbol_list[:20])}
+COINGECKO_BASE = "https://api.coingecko.com/api/v3"
+
+# Per-symbol market data cache; CoinGecko's demo tier allows only a few calls per minute
+market_cache = TTLCache(
+  ttl=float(os.getenv("COINGECKO_CACHE_TTL", "60")),
+  maxsize=int(os.getenv("COINGECKO_CACHE_SIZE", "512")),
+)
+# A REPL follow-up mustn't quote prices older than the market cache would
+session.limit_tool_ttl("get_coingecko_market_data", market_cache.ttl)
+
+
+def fetch_coingecko_markets(symbol_list):
+  """Fetch /coins/markets for the given lowercase tickers or coin names and group the coins by query.
+
+  Queries the symbol index knows are fetched by CoinGecko id, so a ticker
+  shared by several coins maps to the largest one. The rest go through the
+  `symbols` parameter and keep every coin with that symbol.
+  """
   headers = {}
   api_key = os.getenv("COINGECKO_API_KEY")
   if api_key:
     headers["x-cg-demo-api-key"] = api_key
+  coin_ids = {symbol: resolve_coin_id(symbol) for symbol in symbol_list}
+  by_id = {}
+  for param, values in (("ids", {i for i in coin_ids.values() if i}), ("symbols", [s for s, i in coin_ids.items() if not i])):
+    if not values:
+      continue
+    data = clients.get_json(f"{COINGECKO_BASE}/coins/markets", params={"vs_currency": "usd", param: ",".join(sorted(values))}, headers=headers or None, provider="coingecko")
+    if not isinstance(data, list):
+      raise ValueError("unexpected response from CoinGecko")
+    by_id.update((coin.get("id"), coin) for coin in data)
+  # Queries with no coin are cached as empty lists so unknown tickers don't re-hit the API
+  grouped = {}
+  for symbol, coin_id in coin_ids.items():
+    if coin_id:
+      grouped[symbol] = [by_id[coin_id]] if coin_id in by_id else []
+    else:
+      grouped[symbol] = [coin for coin in by_id.values() if str(coin.get("symbol", "")).lower() == symbol]
+  return grouped
+
+
+def market_cache_stats():
+  """Return hit/miss/stale counters for the CoinGecko market data cache"""
+  return market_cache.stats()
+
+
+def get_market_snapshots(symbols):
+  """Return MarketSnapshots for up to 20 tickers, in request order (raw rows on .raw). Raises on fetch errors."""
+  symbol_list = list(dict.fromkeys(s.strip().lower() for s in symbols.split(",") if s.strip()))[:20]
+  cached = market_cache.get_many(symbol_list, fetch_coingecko_markets)
+  return [market.MarketSnapshot(coin) for symbol in symbol_list for coin in cached.get(symbol, [])]
+
+
+def get_coingecko_market_data(symbols: str) -> str:
+  """Fetch market data (price, market cap, 24h change, volume, 24h high/low) from CoinGecko as a compact table. Pass comma-separated ticker symbols e.g. hype, btc, eth or HYPE, BTC, ETH (lowercased for API)."""
+  if not any(s.strip() for s in symbols.split(",")):
+    return "Error: No symbols provided. Use ticker symbols e.g. hype, btc, eth."
   try:
-    r = requests.get(f"{base}/coins/markets", params=params, headers=headers or None, timeout=10)
-    r.raise_for_status()
-    data = r.json()
+    snapshots = get_market_snapshots(symbols)
   except Exception as e:
     return f"Error: CoinGecko request failed ({e}). Report to user: unable to fetch market data (rate limit or service issue); try again later."
-  if not data or not isinstance(data, list):
+  if not snapshots:
     return f"Error: No coin found on CoinGecko for '{symbols}'. Report to user: no market data for that symbol—check ticker at coingecko.com or try a different symbol."
-  return json.dumps(data, indent=2)
+  return market.format_snapshots(snapshots)
+
+
+# Price history per (coin id, source); refreshed less often than spot prices
+ohlc_cache = TTLCache(
+  ttl=float(os.getenv("COINGECKO_OHLC_CACHE_TTL", "300")),
+  maxsize=int(os.getenv("COINGECKO_CACHE_SIZE", "512")),
+)
+session.limit_tool_ttl("get_technical_indicators", ohlc_cache.ttl)
+
+# CoinGecko's OHLC endpoint picks candle size from the range (4h candles up to
+# 30 days, 4-day candles beyond), so daily and weekly candles are built from a
+# year of daily closes instead; the monthly view uses the 4-day OHLC candles.
+# timeframe -> (candle interval, history source, candles per close-built candle,
+# support/resistance lookback in candles)
+CANDLES = {
+  "daily": ("1d", "closes", 1, 30),
+  "weekly": ("1w", "closes", 7, 26),
+  "monthly": ("4d", "ohlc", None, 30),
+}
+HISTORY_DAYS = 365
+
+
+def fetch_coingecko_history(keys):
+  """Fetch a year of price history for (coin_id, source) keys: daily closes ("closes") or 4-day [open, high, low, close] rows ("ohlc")"""
+  headers = {}
+  api_key = os.getenv("COINGECKO_API_KEY")
+  if api_key:
+    headers["x-cg-demo-api-key"] = api_key
+  history = {}
+  for coin_id, source in keys:
+    if source == "closes":
+      data = clients.get_json(f"{COINGECKO_BASE}/coins/{coin_id}/market_chart", params={"vs_currency": "usd", "days": HISTORY_DAYS, "interval": "daily"}, headers=headers or None, provider="coingecko")
+      history[(coin_id, source)] = [row[1] for row in (data or {}).get("prices") or []]
+    else:
+      rows = clients.get_json(f"{COINGECKO_BASE}/coins/{coin_id}/ohlc", params={"vs_currency": "usd", "days": HISTORY_DAYS}, headers=headers or None, provider="coingecko")
+      history[(coin_id, source)] = [row[1:5] for row in rows or []]
+  return history
+
+
+def get_technical_indicators(symbols: str, timeframe: str = "daily") -> str:
+  """Compute technical indicators (SMA/EMA, RSI, MACD, Bollinger bands, ATR, support/resistance, pivots) from CoinGecko price history. Pass comma-separated ticker symbols e.g. btc, eth and the timeframe (daily, weekly, monthly)."""
+  symbol_list = list(dict.fromkeys(s.strip().lower() for s in symbols.split(",") if s.strip()))[:20]
+  if not symbol_list:
+    return "Error: No symbols provided. Use ticker symbols e.g. btc, eth."
+  timeframe = timeframe.strip().lower()
+  if timeframe not in CANDLES:
+    timeframe = "daily"
+  interval, source, period, lookback = CANDLES[timeframe]
+  try:
+    markets = market_cache.get_many(symbol_list, fetch_coingecko_markets)
+    coin_ids = {symbol: markets[symbol][0]["id"] for symbol in symbol_list if markets.get(symbol)}
+    history = ohlc_cache.get_many([(coin_id, source) for coin_id in coin_ids.values()], fetch_coingecko_history)
+  except Exception as e:
+    return f"Error: CoinGecko request failed ({e}). Report to user: unable to fetch price history for technical analysis; try again later."
+  if not coin_ids:
+    return f"Error: No coin found on CoinGecko for '{symbols}'. Report to user: no price history for that symbol."
+  import indicators  # NumPy loads only once indicators are actually computed
+
+  series = {symbol: history[(coin_id, source)] for symbol, coin_id in coin_ids.items() if history.get((coin_id, source))}
+  if period is not None:
+    series = {symbol: indicators.candles_from_closes(closes, period) for symbol, closes in series.items()}
+  summary = indicators.summarize(series, lookback=lookback)
+  return json.dumps({"timeframe": timeframe, "candle_interval": interval, "days": HISTORY_DAYS, "indicators": summary}, separators=(",", ":"))
 
 
 def safe_web_search(query: str, max_results: int = 10) -> str:
   """Search the web. For news: query MUST include recency (e.g. 'today', 'this week', 'this month') or today's date. Returns search results or a message if search failed."""
   try:
-    with DDGS() as ddgs:
-      results = ddgs.text(query=query, max_results=max_results)
-    return json.dumps(results, indent=2) if results else "No results found."
+    results = search.cached_search(query, max_results=max_results)
   except Exception:
     return "No results (search failed or rate limited)."
+  return search.compact_results(results, reader="safe_web_search") or "No results found."
 
 
 def safe_search_for_sentiment(query: str, max_results: int = 10) -> str:
   """Search the web for crypto/X posts. Query MUST include recency: e.g. 'AVAX crypto twitter today', '$AVAX sentiment recent', or include today's date. Avoid site: or complex operators. Returns search results or a message if search failed (e.g. rate limit)."""
   try:
-    with DDGS() as ddgs:
-      results = ddgs.text(query=query, max_results=max_results)
-    return json.dumps(results, indent=2) if results else "No results found. Report: no recent news or developments."
+    results = search.cached_search(query, max_results=max_results)
   except Exception:
     return "No results (search failed or rate limited). Report: no recent news or developments."
+  return search.compact_results(results, reader="safe_search_for_sentiment") or "No results found. Report: no recent news or developments."
+
+
+# Follow-ups reuse search results no longer than a fresh run would get them from the search cache
+session.limit_tool_ttl("safe_web_search", search.search_cache.ttl)
+session.limit_tool_ttl("safe_search_for_sentiment", search.search_cache.ttl)
 
 
 def collect_crypto_details():
@@ -76,33 +200,25 @@ def collect_crypto_details():
   return crypto_details
 
 
-def build_agent_details(crypto_details, agent_name):
-  """Get the details for a specific agent"""
-  assets = crypto_details['assets']
-  timeframe = crypto_details['timeframe']
-  goal = crypto_details['goal']
-  today = date.today().strftime("%Y-%m-%d")
-
-  if agent_name == "market_agent":
-    details = f"""I'm analyzing {assets} with a {timeframe} view. Goal: {goal}.
+# Per-agent task briefs, defined once at import and filled in with the collected
+# details before a run. Each brief reaches its member through session_state
+# (member instructions reference {<agent_name>_brief}), so members don't spend a
+# model turn working out their task and the coordinator never has to relay it.
+AGENT_TEMPLATES = {
+  "market_agent": """I'm analyzing {assets} with a {timeframe} view. Goal: {goal}.
 
     Please help with:
     - Price context and recent moves
     - Key levels or support/resistance if relevant
-    - Summary suited to my goal"""
-
-    return details
+    - Summary suited to my goal""",
 
-  elif agent_name == "news_agent":
-    return f"""Find news and sentiment for {assets}. Timeframe: {timeframe}. Today's date: {today}.
+  "news_agent": """Find news and sentiment for {assets}. Timeframe: {timeframe}. Today's date: {today}.
 
-CRITICAL — recency: Every search query MUST include recency so results match the user's timeframe. Use: "today" or "{today}" for daily; "this week" for weekly; "this month" for monthly. Example: "BTC crypto news today" or "ETH {timeframe} news". Do NOT search without a date/timeframe term or you will get stale news."""
+CRITICAL — recency: Every search query MUST include recency so results match the user's timeframe. Use: "today" or "{today}" for daily; "this week" for weekly; "this month" for monthly. Example: "BTC crypto news today" or "ETH {timeframe} news". Do NOT search without a date/timeframe term or you will get stale news.""",
 
-  elif agent_name == "technical_agent":
-    return f"Technical analysis for {assets} on {timeframe} timeframe. Goal: {goal}."
+  "technical_agent": "Technical analysis for {assets} on {timeframe} timeframe. Goal: {goal}.",
 
-  elif agent_name == "sentiment_agent":
-    return f"""Collect sentiment from X (Twitter) for: {assets}. Timeframe: {timeframe}. Today's date: {today}.
+  "sentiment_agent": """Collect current sentiment from X (Twitter) for: {assets}. Today's date: {today}.
 
 Search convention: On X, people refer to coins with the $ prefix (e.g. $AVAX for AVAX) or sometimes the ticker alone (AVAX). When searching, use both: $TICKER and TICKER for each asset ({assets}).
 CRITICAL — recency: Every search query MUST include recency so results are current. Add one of: "today", "recent", "{today}", or "this week" into the query. Example: "AVAX crypto twitter today" or "$AVAX sentiment recent" or "AVAX cryptocurrency {today}". Do NOT search without a date/recency term or you will get old posts with outdated prices.
@@ -113,78 +229,310 @@ Rules:
 - Look across many X posts to summarize overall sentiment (bullish, bearish, neutral, fearful, greedy).
 - If you find very few relevant posts or almost no recent chatter, respond clearly: "No recent news or developments" or "Little to no recent chatter on X for {assets}."
 - Do not invent posts. If there is not much data, say so.
-- In your response, do not mention that you are ignoring posts with many hashtags or describe your filtering method; only report the sentiment summary."""
-
-  return None
-
-
-market_agent = Agent(
-  name="Market agent",
-  tools=[get_coingecko_market_data],
-  role="Provide market context and price summary for given crypto assets",
-  instructions=[
-    "FIRST: get context with build_agent_details(crypto_details, 'market_agent'). Extract the asset ticker(s) the user asked for (e.g. HYPE, BTC, ETH, SOL).",
-    "Call get_coingecko_market_data with comma-separated ticker symbols, e.g. get_coingecko_market_data('hype') or get_coingecko_market_data('btc,eth,sol'). Pass the ticker as the user gave it (the tool lowercases for the API). Use the returned price, market cap, and 24h change to give a market overview and recommendations.",
-    "If the tool returns an Error: message (e.g. CoinGecko request failed, rate limit, no data), tell the user clearly that market data could not be fetched and suggest trying again later.",
-  ],
-  markdown=True,
-)
-
-news_agent = Agent(
-  name="News agent",
-  tools=[safe_web_search],
-  role="Find news and sentiment for crypto assets",
-  instructions=[
-    "FIRST: get your task with build_agent_details(crypto_details, 'news_agent'). You will receive today's date and the user's timeframe (daily, weekly, monthly).",
-    "Use the safe_web_search tool. Every query MUST include a recency term: for daily use 'today' or today's date; for weekly use 'this week'; for monthly use 'this month'. Example: 'BTC crypto news today', 'ETH news this week'. Never search without a date/timeframe term or results will be stale.",
-    "Summarize relevant news and sentiment for the given assets and focus.",
-  ],
-  model=OpenRouter(id="openai/gpt-4o"),
-  markdown=True,
-)
+- In your response, do not mention that you are ignoring posts with many hashtags or describe your filtering method; only report the sentiment summary.""",
+}
 
-technical_agent = Agent(
-  name="Technical agent",
-  role="Provide technical analysis for crypto assets",
-  model=OpenRouter(id="openai/gpt-4o"),
-  instructions=[
-    "Use build_agent_details(crypto_details, 'technical_agent') for the analysis request.",
-    "Give technical analysis (levels, indicators, structure) for the given timeframe and goal.",
-  ],
-  markdown=True,
-)
 
-sentiment_agent = Agent(
-  name="X sentiment agent",
-  role="Collect and summarize sentiment from X (Twitter) posts that mention the given crypto ticker(s)",
-  tools=[safe_search_for_sentiment],
-  model=OpenRouter(id="x-ai/grok-3"),
-  instructions=[
-    "FIRST: get your task with build_agent_details(crypto_details, 'sentiment_agent'). You will receive today's date and the user's timeframe.",
-    "Use the safe_search_for_sentiment tool. Every query MUST include a recency term: e.g. 'AVAX crypto twitter today', '$AVAX sentiment recent', or include today's date from your task. Never search without today/recent/date or results will be stale with wrong prices.",
-    "Only consider posts that explicitly mention the ticker ($ or plain). Ignore posts with more than 2 hashtags (treat as spam); do not mention this filtering in your response.",
-    "If the tool returns 'No results' or 'search failed', respond with: no recent news or developments / little to no recent chatter. Otherwise summarize sentiment: overall tone (bullish/bearish/neutral), fear/greed, key themes. Do not invent or exaggerate.",
-  ],
-  markdown=True,
-)
+def build_agent_details(crypto_details, agent_name):
+  """Get the details for a specific agent"""
+  template = AGENT_TEMPLATES.get(agent_name)
+  if template is None:
+    return None
+  return template.format(
+    assets=crypto_details['assets'],
+    timeframe=crypto_details['timeframe'],
+    goal=crypto_details['goal'],
+    today=date.today().strftime("%Y-%m-%d"),
+  )
+
+
+def build_agent_briefs(crypto_details):
+  """Build every member's task brief up front: {agent_name: brief}"""
+  return {agent_name: build_agent_details(crypto_details, agent_name) for agent_name in AGENT_TEMPLATES}
+
+
+@registry.factory("crypto.market_agent")
+def build_market_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Market agent",
+    tools=[get_coingecko_market_data],
+    tool_hooks=[tracing.tool_hook, session.tool_hook],
+    **routing.route("crypto.market_agent"),
+    role="Provide market context and price summary for given crypto assets",
+    instructions=[
+      "Task brief:\n{market_agent_brief}",
+      "Extract the asset ticker(s) from your brief (e.g. HYPE, BTC, ETH, SOL).",
+      "Call get_coingecko_market_data with comma-separated ticker symbols, e.g. get_coingecko_market_data('hype') or get_coingecko_market_data('btc,eth,sol'). Pass the ticker as the user gave it (the tool lowercases for the API). Use the returned price, market cap, and 24h change to give a market overview and recommendations.",
+      "If the tool returns an Error: message (e.g. CoinGecko request failed, rate limit, no data), tell the user clearly that market data could not be fetched and suggest trying again later.",
+    ],
+    markdown=True,
+  )
+
+
+@registry.factory("crypto.news_agent")
+def build_news_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="News agent",
+    tools=[safe_web_search],
+    tool_hooks=[tracing.tool_hook, session.tool_hook],
+    role="Find news and sentiment for crypto assets",
+    instructions=[
+      "Task brief:\n{news_agent_brief}",
+      "Use the safe_web_search tool. Every query MUST include a recency term: for daily use 'today' or today's date; for weekly use 'this week'; for monthly use 'this month'. Example: 'BTC crypto news today', 'ETH news this week'. Never search without a date/timeframe term or results will be stale.",
+      "Summarize relevant news and sentiment for the given assets and focus.",
+    ],
+    **routing.route("crypto.news_agent"),
+    markdown=True,
+  )
+
+
+@registry.factory("crypto.technical_agent")
+def build_technical_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Technical agent",
+    role="Provide technical analysis for crypto assets",
+    tools=[get_technical_indicators],
+    tool_hooks=[tracing.tool_hook, session.tool_hook],
+    **routing.route("crypto.technical_agent"),
+    instructions=[
+      "Task brief:\n{technical_agent_brief}",
+      "Call get_technical_indicators once with all tickers and the timeframe, e.g. get_technical_indicators('btc,eth', 'daily').",
+      "Give technical analysis (levels, indicators, structure) for the given timeframe and goal using only the returned numbers; do not invent values. Null means not enough history for that indicator.",
+      "If the tool returns an Error: message, tell the user the price history could not be fetched.",
+    ],
+    markdown=True,
+  )
+
+
+@registry.factory("crypto.sentiment_agent")
+def build_sentiment_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="X sentiment agent",
+    role="Collect and summarize sentiment from X (Twitter) posts that mention the given crypto ticker(s)",
+    tools=[safe_search_for_sentiment],
+    tool_hooks=[tracing.tool_hook, session.tool_hook],
+    **routing.route("crypto.sentiment_agent"),
+    instructions=[
+      "Task brief:\n{sentiment_agent_brief}",
+      "Use the safe_search_for_sentiment tool. Every query MUST include a recency term: e.g. 'AVAX crypto twitter today', '$AVAX sentiment recent', or include today's date from your task. Never search without today/recent/date or results will be stale with wrong prices.",
+      "Only consider posts that explicitly mention the ticker ($ or plain). Ignore posts with more than 2 hashtags (treat as spam); do not mention this filtering in your response.",
+      "If the tool returns 'No results' or 'search failed', respond with: no recent news or developments / little to no recent chatter. Otherwise summarize sentiment: overall tone (bullish/bearish/neutral), fear/greed, key themes. Do not invent or exaggerate.",
+    ],
+    markdown=True,
+  )
+
+
+@registry.factory("crypto.team")
+def build_team():
+  from agno.team import Team
+  return Team(
+    members=list(registry.get("crypto.members").values()),
+    **routing.route("crypto.coordinator"),
+    instructions=[
+      "You are a team of agents providing crypto analysis for the given assets.",
+      "Each member already has its own task brief; delegate to every member with a short task, without restating the details.",
+      "Coordinate market, news, technical, and X sentiment agents to produce a coherent analysis.",
+    ],
+    markdown=True,
+    post_hooks=[tracing.run_hook],
+    show_members_responses=True,
+    compression_manager=compaction.manager("crypto"),
+  )
+
+
+# Members run independently of each other, so --parallel dispatches them all at
+# once and this agent merges their results in place of the team coordinator.
+@registry.factory("crypto.synthesis_agent")
+def build_synthesis_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Synthesis agent",
+    role="Combine member results into one crypto analysis",
+    **routing.route("crypto.synthesis_agent"),
+    instructions=[
+      "You receive the market, news, technical, and X sentiment results for the given assets.",
+      "Produce a coherent analysis suited to the user's timeframe and goal. Only use the information provided.",
+    ],
+    markdown=True,
+  )
+
+
+@registry.factory("crypto.members")
+def build_members():
+  """{agent_name: member} in the order the team and the parallel fan-out use"""
+  return {name: registry.get(f"crypto.{name}") for name in ("market_agent", "news_agent", "technical_agent", "sentiment_agent")}
+
+
+# Agents, teams and members are module attributes too (crypto.team), built on first access
+__getattr__ = registry.module_getattr("crypto")
+
+
+def build_team_query(crypto_details):
+  """Build the team request for the collected crypto details"""
+  return f"""Run a full crypto analysis with:
+      - Assets: {crypto_details['assets']}
+      - Timeframe: {crypto_details['timeframe']}
+      - Goal: {crypto_details['goal']}
 
-team = Team(
-  members=[market_agent, news_agent, technical_agent, sentiment_agent],
-  model=OpenRouter(id="openai/gpt-4o"),
-  instructions=[
-    "You are a team of agents providing crypto analysis for the given assets.",
-    "Use build_agent_details to get specific details for each agent.",
-    "Coordinate market, news, technical, and X sentiment agents to produce a coherent analysis.",
-  ],
-  markdown=True,
-  show_members_responses=True,
-)
+      Coordinate all agents to provide market context, news, X sentiment (from posts mentioning the ticker; ignore multi-hashtag spam), and technical analysis."""
 
 
-def main():
+async def run_parallel_analysis(crypto_details, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT):
+  """Run all members concurrently on their briefs, then synthesize. Returns (member_results, report)."""
+  tasks = {key: (agent, fanout.MEMBER_TASK) for key, agent in registry.get("crypto.members").items()}
+  session_state = fanout.brief_session_state(build_agent_briefs(crypto_details))
+  with search.search_scope():
+    return await fanout.run_parallel(tasks, registry.get("crypto.synthesis_agent"), build_team_query(crypto_details), member_timeout, session_state, compaction.member_budget("crypto"))
+
+
+def stream_analysis(crypto_details, parallel=False, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT):
+  """Async iterator of (event, data) pairs for an analysis, with each member's output as it is produced"""
+  session_state = fanout.brief_session_state(build_agent_briefs(crypto_details))
+  query = build_team_query(crypto_details)
+  if parallel:
+    tasks = {key: (agent, fanout.MEMBER_TASK) for key, agent in registry.get("crypto.members").items()}
+    return streaming.stream_parallel(tasks, registry.get("crypto.synthesis_agent"), query, member_timeout, session_state, run_context=search.search_scope, budget=compaction.member_budget("crypto"))
+  return streaming.stream_team(registry.get("crypto.team"), query, session_state, run_context=search.search_scope)
+
+
+# Result cache TTL per timeframe in seconds; longer views go stale more slowly
+RESULT_CACHE_TTLS = {"daily": 15 * 60, "weekly": 60 * 60, "monthly": 6 * 60 * 60}
+
+
+def result_cache_key(crypto_details):
+  """Result cache key: sorted lowercase tickers, timeframe, goal, and today's date"""
+  tickers = sorted({s.strip().lower() for s in crypto_details['assets'].split(",") if s.strip()})
+  return result_cache.make_key("crypto", {
+    'assets': tickers,
+    'timeframe': crypto_details['timeframe'].strip().lower(),
+    'goal': crypto_details['goal'].strip().lower(),
+    'date': date.today().isoformat(),
+  })
+
+
+def run_analysis(crypto_details, parallel=False, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT):
+  """Run a full analysis without printing and return the report; raises fanout.RunFailed if it failed"""
+  if parallel:
+    return fanout.checked_report(*asyncio.run(run_parallel_analysis(crypto_details, member_timeout)))
+  session_state = fanout.brief_session_state(build_agent_briefs(crypto_details))
+  with search.search_scope():
+    return fanout.checked_content(registry.get("crypto.team").run(build_team_query(crypto_details), session_state=session_state))
+
+
+def print_team_analysis(crypto_details):
+  """Run the team on crypto_details, streaming the coordinator's response to the terminal"""
+  session_state = fanout.brief_session_state(build_agent_briefs(crypto_details))
+  with search.search_scope():
+    registry.get("crypto.team").print_response(build_team_query(crypto_details), stream=True, session_state=session_state)
+
+
+def load_watchlist(path):
+  """Read a watchlist of crypto details from a CSV (assets,timeframe,goal columns) or JSONL file"""
+  with open(path, newline="") as f:
+    if path.endswith(".csv"):
+      rows = list(csv.DictReader(f))
+    else:
+      rows = [json.loads(line) for line in f if line.strip()]
+  watchlist = []
+  for row in rows:
+    assets = (row.get('assets') or "").strip()
+    if not assets:
+      continue
+    watchlist.append({
+      'assets': assets,
+      'timeframe': (row.get('timeframe') or "").strip().lower() or "daily",
+      'goal': (row.get('goal') or "").strip().lower(),
+    })
+  return watchlist
+
+
+def watchlist_symbols(details):
+  """Lowercase tickers of one watchlist entry"""
+  return [s.strip().lower() for s in details['assets'].split(",") if s.strip()]
+
+
+def upcoming_symbols(watchlist, start, limit=20):
+  """Distinct tickers not in the market data cache, from the watchlist entries at start on, up to limit (one CoinGecko call)"""
+  symbols = []
+  for details in watchlist[start:]:
+    for s in watchlist_symbols(details):
+      if s not in symbols and s not in market_cache:
+        if len(symbols) == limit:
+          return symbols
+        symbols.append(s)
+  return symbols
+
+
+def prefetch_market_data(symbols):
+  """Warm the market data cache for symbols in one CoinGecko call; cached ones aren't fetched again"""
+  try:
+    market_cache.get_many(symbols, fetch_coingecko_markets)
+  except Exception as e:
+    print(f"Warning: CoinGecko prefetch failed ({e}); members will retry per asset.", file=sys.stderr)
+
+
+async def run_watchlist(watchlist, out, concurrency=4, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT):
+  """Analyze every watchlist entry with at most `concurrency` running at once, writing JSONL to out as each finishes.
+
+  Each entry's status is ok, partial (a member didn't finish; the report says
+  which) or error (the synthesis failed or the run raised).
+  """
+  semaphore = asyncio.Semaphore(concurrency)
+
+  async def analyze(index, crypto_details):
+    async with semaphore:
+      # When this entry's market data isn't cached, fetch it along with the next entries' uncached tickers,
+      # as the entry starts so the data is still fresh when they run
+      if any(s not in market_cache for s in watchlist_symbols(crypto_details)):
+        await asyncio.to_thread(prefetch_market_data, upcoming_symbols(watchlist, index))
+      start = time.perf_counter()
+      results = {}
+      try:
+        with tracing.trace_run("crypto", **crypto_details):
+          results, report = await run_parallel_analysis(crypto_details, member_timeout)
+        status, report = "ok", fanout.checked_report(results, report)
+      except fanout.RunFailed as e:
+        status, report = ("partial" if results else "error"), e.content
+      except Exception as e:
+        status, report = "error", f"Failed: {e}"
+      return {
+        "index": index,
+        **crypto_details,
+        "status": status,
+        "seconds": round(time.perf_counter() - start, 3),
+        "members": {key: {"status": r["status"], "seconds": r["seconds"]} for key, r in results.items()},
+        "report": report,
+      }
+
+  # Watchlist calls queue behind interactive ones for the shared provider rate limits
+  with ratelimit.priority("batch"):
+    for finished in asyncio.as_completed([analyze(i, d) for i, d in enumerate(watchlist)]):
+      out.write(json.dumps(await finished) + "\n")
+      out.flush()
+
+
+def run_batch(watchlist_path, output_path=None, concurrency=4, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT):
+  """Headless entry point: analyze a watchlist file and stream JSONL results to output_path (stdout if None)"""
+  watchlist = load_watchlist(watchlist_path)
+  if output_path is None:
+    asyncio.run(run_watchlist(watchlist, sys.stdout, concurrency, member_timeout))
+    return
+  with open(output_path, "w") as out:
+    asyncio.run(run_watchlist(watchlist, out, concurrency, member_timeout))
+
+
+def main(parallel=False, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT, stream=False):
   print("Welcome to the Crypto Analysis Assistant!")
   print("Type 'exit', 'quit', or 'q' at any prompt to stop.\n")
 
+  cache = result_cache.open_result_cache()
+  # Follow-ups in this loop reuse unchanged member results and repeated tool calls
+  memory = session.open_session_memory()
+
   while True:
     try:
       print("Let's set up your analysis. Please answer a few questions:\n")
@@ -201,16 +549,18 @@ def main():
       print(f"Goal: {crypto_details['goal']}")
       print("="*50 + "\n")
 
-      query = f"""Run a full crypto analysis with:
-      - Assets: {crypto_details['assets']}
-      - Timeframe: {crypto_details['timeframe']}
-      - Goal: {crypto_details['goal']}
-
-      Coordinate all agents to provide market context, news, X sentiment (from posts mentioning the ticker; ignore multi-hashtag spam), and technical analysis."""
-
       print("Running analysis...\n")
 
-      team.print_response(query, stream=True)
+      with tracing.trace_run("crypto", **crypto_details) as trace, session.use(memory):
+        fanout.run_interactive(
+          lambda: run_analysis(crypto_details, parallel, member_timeout),
+          stream=stream and (lambda: stream_analysis(crypto_details, parallel, member_timeout)),
+          parallel=parallel and (lambda: run_parallel_analysis(crypto_details, member_timeout)),
+          team=lambda: print_team_analysis(crypto_details),
+          cache=cache, cache_key=result_cache_key(crypto_details),
+          ttl=RESULT_CACHE_TTLS.get(crypto_details['timeframe'], RESULT_CACHE_TTLS["daily"]),
+        )
+      tracing.print_summary(trace)
 
       print("\n" + "="*50 + "\n")
 
@@ -228,4 +578,15 @@ def main():
 
 
 if __name__ == "__main__":
-  main()
+  parser = argparse.ArgumentParser(description="Crypto Analysis Assistant")
+  parser.add_argument("--parallel", action="store_true", help="run all members concurrently, then synthesize")
+  parser.add_argument("--member-timeout", type=float, default=fanout.DEFAULT_MEMBER_TIMEOUT, help="seconds to wait for each member in --parallel mode")
+  parser.add_argument("--stream", action="store_true", help="print each member's output and tool calls as they are produced")
+  parser.add_argument("--watchlist", help="analyze every entry of a CSV/JSONL watchlist non-interactively")
+  parser.add_argument("--output", help="JSONL file for --watchlist results (default: stdout)")
+  parser.add_argument("--concurrency", type=int, default=4, help="max watchlist entries analyzed at once")
+  args = parser.parse_args()
+  if args.watchlist:
+    run_batch(args.watchlist, args.output, args.concurrency, args.member_timeout)
+  else:
+    main(parallel=args.parallel, member_timeout=args.member_timeout, stream=args.stream)
@@ -0,0 +1,169 @@
+import asyncio
+import time
+
+import compaction
+import result_cache
+import session
+import tracing
+
+# Concurrent execution of independent team members. Instead of letting the team
+# coordinator delegate to members one after another, every member task is
+# dispatched at once and a synthesis agent combines the results, so wall-clock
+# time is roughly the slowest member plus synthesis. Inside a session.use()
+# block, members and reports whose inputs are unchanged are reused instead.
+# Member results are compacted to a per-member token budget before synthesis.
+
+DEFAULT_MEMBER_TIMEOUT = 90.0
+
+# Input given to a member whose brief is already in its instructions
+MEMBER_TASK = "Complete the task in your brief."
+
+# agno's RunStatus.completed; a failed model call doesn't raise, it ends the run with status ERROR
+# and the error message as content. Compared as a string so agno needn't be imported here.
+COMPLETED = "COMPLETED"
+
+
+class RunFailed(Exception):
+  """A run that errored or lost members; content is what it produced anyway, shown but never cached"""
+
+  def __init__(self, content):
+    super().__init__(content)
+    self.content = content
+
+
+def completed(run_output):
+  """True if an agno run (or its final event) finished normally"""
+  return getattr(run_output, "status", None) == COMPLETED
+
+
+def checked_content(run_output):
+  """The run's content, or RunFailed if the run didn't complete"""
+  if not completed(run_output):
+    raise RunFailed(f"Failed: {run_output.content or 'run did not complete'}")
+  return run_output.content
+
+
+def checked_report(results, report):
+  """The synthesized report, or RunFailed carrying it when a member didn't finish"""
+  failed = [r["name"] for r in results.values() if r["status"] != "ok"]
+  if failed:
+    raise RunFailed(f"{report}\n\n(Incomplete: {', '.join(failed)} did not finish.)")
+  return report
+
+
+def brief_session_state(briefs):
+  """Map {agent_name: brief} to session_state keys that member instructions reference as {agent_name_brief}"""
+  return {f"{agent_name}_brief": brief for agent_name, brief in briefs.items()}
+
+
+async def run_member(agent, task, timeout=DEFAULT_MEMBER_TIMEOUT, session_state=None):
+  """Run one member agent on its task and return a result dict (status, content, seconds)"""
+  start = time.perf_counter()
+  try:
+    with tracing.span(agent.name, kind="member"):
+      response = await asyncio.wait_for(agent.arun(task, session_state=session_state), timeout)
+    tracing.record_run_output(response)
+    status, content = "ok" if completed(response) else "error", response.content
+  except asyncio.TimeoutError:
+    status, content = "timeout", f"No response within {timeout:g}s."
+  except Exception as e:
+    status, content = "error", f"Failed: {e}"
+  return {
+    "name": agent.name,
+    "status": status,
+    "content": content if isinstance(content, str) else str(content or ""),
+    "seconds": round(time.perf_counter() - start, 3),
+  }
+
+
+async def run_members(tasks, timeout=DEFAULT_MEMBER_TIMEOUT, session_state=None):
+  """Run {key: (agent, task)} concurrently and return {key: result} in the same order.
+
+  Members the current session already ran on the same brief are not run again;
+  their earlier result is returned with reused=True.
+  """
+  memory = session.current()
+  reused = memory.reuse(tasks, session_state) if memory is not None else {}
+  pending = [key for key in tasks if key not in reused]
+  results = await asyncio.gather(*(run_member(*tasks[key], timeout, session_state) for key in pending))
+  fresh = dict(zip(pending, results))
+  if memory is not None:
+    for key, result in fresh.items():
+      memory.remember(key, tasks[key][1], session_state, result)
+  return {key: reused.get(key) or fresh[key] for key in tasks}
+
+
+def build_synthesis_prompt(query, results, budget=None):
+  """Combine the original request and member results, compacted to budget tokens each, into the synthesis prompt"""
+  sections = []
+  for result in compaction.compact_results(results, budget).values():
+    note = "" if result["status"] == "ok" else f" ({result['status']})"
+    sections.append(f"## {result['name']}{note}\n\n{result['content']}")
+  return f"""{query}
+
+The team members have already done their research. Their results follow; members marked timeout or error did not finish, so note the gap instead of filling it in.
+
+{chr(10).join(sections)}"""
+
+
+async def run_parallel(tasks, synthesizer, query, timeout=DEFAULT_MEMBER_TIMEOUT, session_state=None, budget=None):
+  """Fan out member tasks concurrently, then run the synthesizer over their results.
+
+  budget is the token budget each member result is compacted to (None keeps
+  them whole). Returns (member_results, synthesis_text) with the full results;
+  raises RunFailed if the synthesizer's run fails.
+  """
+  results = await run_members(tasks, timeout, session_state)
+  prompt = build_synthesis_prompt(query, results, budget)
+  memory = session.current()
+  report = memory.reports.get(prompt) if memory is not None else None
+  if report is not None:
+    return results, report
+  with tracing.span(synthesizer.name, kind="member"):
+    response = await synthesizer.arun(prompt)
+  tracing.record_run_output(response)
+  report = checked_content(response)
+  if memory is not None and all(r["status"] == "ok" for r in results.values()) and report:
+    memory.reports.set(prompt, report)
+  return results, report
+
+
+def print_parallel_results(results, synthesis):
+  """Print member results followed by the synthesized report"""
+  for result in results.values():
+    timing = "reused" if result.get("reused") else f"{result['seconds']:.1f}s"
+    print(f"--- {result['name']} [{result['status']}, {timing}] ---\n")
+    print(result["content"])
+    print()
+  print("="*50)
+  print(synthesis)
+
+
+def run_interactive(run, stream=None, parallel=None, team=None, cache=None, cache_key=None, ttl=None):
+  """Print one analysis for a script's prompt loop, the way its cache, --stream and --parallel settings ask.
+
+  run() returns the report or raises RunFailed. stream() returns the event
+  stream when --stream is on, parallel() the (results, report) coroutine when
+  --parallel is on, and team() prints the coordinator's response otherwise.
+  With a result cache, run() (or the printed stream) goes through it. A failed
+  run is printed instead of raised.
+  """
+  import streaming  # streaming imports this module
+
+  try:
+    if cache is not None:
+      compute = (lambda: asyncio.run(streaming.print_events(stream(), raise_on_failure=True))) if stream else run
+      report, hit = result_cache.run_cached(cache, cache_key, ttl, compute)
+      if hit:
+        print("(cached result)\n")
+      if hit or not stream:
+        print(report)
+    elif stream:
+      asyncio.run(streaming.print_events(stream()))
+    elif parallel:
+      print_parallel_results(*asyncio.run(parallel()))
+    else:
+      team()
+  except RunFailed as e:
+    # Shown, but not cached
+    print(f"\n{e.content}\n\nThe run failed; try again later.\n")
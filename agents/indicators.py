@@ -0,0 +1,171 @@
+import numpy as np
+
+# Deterministic technical indicators over OHLC candles. Every function takes
+# 2-D arrays shaped (assets, candles) so a whole watchlist is computed in one
+# vectorized pass; values that need more history than is available are NaN.
+
+
+def sma(x, n):
+  """Simple moving average over the last n candles"""
+  out = np.full(x.shape, np.nan)
+  if x.shape[1] < n:
+    return out
+  csum = np.cumsum(x, axis=1)
+  out[:, n - 1] = csum[:, n - 1] / n
+  out[:, n:] = (csum[:, n:] - csum[:, :-n]) / n
+  return out
+
+
+def rolling_std(x, n):
+  """Population standard deviation over the last n candles"""
+  out = np.full(x.shape, np.nan)
+  if x.shape[1] < n:
+    return out
+  windows = np.lib.stride_tricks.sliding_window_view(x, n, axis=1)
+  out[:, n - 1:] = windows.std(axis=2)
+  return out
+
+
+def _smooth(x, n, alpha):
+  """Exponential smoothing seeded with the SMA of the first n values (NaN before that)"""
+  out = np.full(x.shape, np.nan)
+  if x.shape[1] < n:
+    return out
+  out[:, n - 1] = x[:, :n].mean(axis=1)
+  for t in range(n, x.shape[1]):
+    out[:, t] = alpha * x[:, t] + (1 - alpha) * out[:, t - 1]
+  return out
+
+
+def ema(x, n):
+  """Exponential moving average with the standard 2 / (n + 1) weight"""
+  return _smooth(x, n, 2.0 / (n + 1))
+
+
+def wilder(x, n):
+  """Wilder's smoothing (alpha 1 / n), used by RSI and ATR"""
+  return _smooth(x, n, 1.0 / n)
+
+
+def rsi(close, n=14):
+  """Relative strength index (0-100)"""
+  out = np.full(close.shape, np.nan)
+  if close.shape[1] <= n:
+    return out
+  change = np.diff(close, axis=1)
+  avg_gain = wilder(np.clip(change, 0, None), n)
+  avg_loss = wilder(np.clip(-change, 0, None), n)
+  with np.errstate(divide="ignore", invalid="ignore"):
+    rs = avg_gain / avg_loss
+    out[:, 1:] = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + rs))
+  return out
+
+
+def macd(close, fast=12, slow=26, signal=9):
+  """MACD line, signal line and histogram"""
+  line = ema(close, fast) - ema(close, slow)
+  signal_line = np.full(close.shape, np.nan)
+  start = slow - 1
+  if close.shape[1] - start >= signal:
+    signal_line[:, start:] = ema(line[:, start:], signal)
+  return line, signal_line, line - signal_line
+
+
+def bollinger(close, n=20, k=2.0):
+  """Bollinger bands: (middle, upper, lower)"""
+  mid = sma(close, n)
+  width = k * rolling_std(close, n)
+  return mid, mid + width, mid - width
+
+
+def atr(high, low, close, n=14):
+  """Average true range"""
+  out = np.full(close.shape, np.nan)
+  if close.shape[1] <= n:
+    return out
+  prev_close = close[:, :-1]
+  true_range = np.maximum.reduce([
+    high[:, 1:] - low[:, 1:],
+    np.abs(high[:, 1:] - prev_close),
+    np.abs(low[:, 1:] - prev_close),
+  ])
+  out[:, 1:] = wilder(true_range, n)
+  return out
+
+
+def pivots(high, low, close):
+  """Classic floor pivots from the last candle: dict of (assets,) arrays"""
+  h, l, c = high[:, -1], low[:, -1], close[:, -1]
+  p = (h + l + c) / 3
+  return {
+    "pivot": p,
+    "r1": 2 * p - l,
+    "s1": 2 * p - h,
+    "r2": p + (h - l),
+    "s2": p - (h - l),
+  }
+
+
+def candles_from_closes(closes, period=1):
+  """(n, 4) open, high, low, close candles of period closes each, built from a close series (oldest first).
+
+  Each candle opens at the previous candle's close and its high and low only
+  see closes, so ranges (ATR, pivots, support/resistance) come out narrower
+  than exchange candles. A partial oldest period is dropped.
+  """
+  closes = np.asarray(closes, dtype=float)
+  n = (len(closes) - 1) // period
+  if n <= 0:
+    return np.empty((0, 4))
+  start = len(closes) - n * period
+  body = closes[start:].reshape(n, period)
+  opens = closes[start - 1::period][:n]
+  return np.column_stack([opens, np.maximum(opens, body.max(axis=1)), np.minimum(opens, body.min(axis=1)), body[:, -1]])
+
+
+def _round(value):
+  """JSON-friendly rounding to 6 significant digits; NaN becomes None"""
+  value = float(value)
+  return None if np.isnan(value) else float(f"{value:.6g}")
+
+
+def summarize(ohlc, lookback=20):
+  """Latest indicator values for each asset.
+
+  ohlc maps a name to an (n, 4) array-like of open, high, low, close candles.
+  Series of equal length are stacked and computed together. Returns
+  {name: {indicator: value}}.
+  """
+  groups = {}
+  for name, candles in ohlc.items():
+    candles = np.asarray(candles, dtype=float)
+    if candles.ndim == 2 and candles.shape[0] > 0:
+      groups.setdefault(candles.shape[0], []).append((name, candles))
+
+  summary = {}
+  for length, members in groups.items():
+    stacked = np.stack([candles for _, candles in members])
+    high, low, close = stacked[:, :, 1], stacked[:, :, 2], stacked[:, :, 3]
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_mid, bb_upper, bb_lower = bollinger(close)
+    latest = {
+      "close": close[:, -1],
+      "sma_20": sma(close, 20)[:, -1],
+      "sma_50": sma(close, 50)[:, -1],
+      "ema_12": ema(close, 12)[:, -1],
+      "ema_26": ema(close, 26)[:, -1],
+      "rsi_14": rsi(close)[:, -1],
+      "macd": macd_line[:, -1],
+      "macd_signal": macd_signal[:, -1],
+      "macd_hist": macd_hist[:, -1],
+      "bb_upper": bb_upper[:, -1],
+      "bb_mid": bb_mid[:, -1],
+      "bb_lower": bb_lower[:, -1],
+      "atr_14": atr(high, low, close)[:, -1],
+      "support": low[:, -lookback:].min(axis=1),
+      "resistance": high[:, -lookback:].max(axis=1),
+      **pivots(high, low, close),
+    }
+    for i, (name, _) in enumerate(members):
+      summary[name] = {"candles": length, **{key: _round(values[i]) for key, values in latest.items()}}
+  return summary
@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import tempfile
+from functools import lru_cache
+
+import clients
+import result_cache
+from cache import TTLCache
+
+# Yahoo Finance key statistics for stocks.py. One page is scraped through
+# Firecrawl (instead of a multi-page crawl), the statistics tables are parsed
+# into named fields, and the parsed result is cached per ticker in memory and
+# on disk, so repeat lookups of popular tickers make no Firecrawl call at all.
+
+KEY_STATS_URL = "https://finance.yahoo.com/quote/{ticker}/key-statistics"
+FIRECRAWL_API_URL = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev")
+
+CACHE_TTL = float(os.getenv("KEY_STATS_CACHE_TTL", str(6 * 60 * 60)))
+
+# Parsed statistics per ticker; the in-memory layer also de-duplicates concurrent lookups
+key_stats_cache = TTLCache(ttl=CACHE_TTL, maxsize=int(os.getenv("KEY_STATS_CACHE_SIZE", "256")))
+
+# Yahoo row label (lowercase, without footnotes or "(ttm)"-style qualifiers) -> field name
+FIELDS = {
+  "market cap": "market_cap",
+  "enterprise value": "enterprise_value",
+  "trailing p/e": "trailing_pe",
+  "forward p/e": "forward_pe",
+  "peg ratio": "peg_ratio",
+  "price/sales": "price_to_sales",
+  "price/book": "price_to_book",
+  "enterprise value/revenue": "ev_to_revenue",
+  "enterprise value/ebitda": "ev_to_ebitda",
+  "beta": "beta",
+  "52 week change": "change_52w",
+  "52 week high": "high_52w",
+  "52 week low": "low_52w",
+  "profit margin": "profit_margin",
+  "operating margin": "operating_margin",
+  "return on assets": "return_on_assets",
+  "return on equity": "return_on_equity",
+  "revenue": "revenue",
+  "quarterly revenue growth": "revenue_growth",
+  "gross profit": "gross_profit",
+  "ebitda": "ebitda",
+  "net income avi to common": "net_income",
+  "diluted eps": "eps",
+  "quarterly earnings growth": "earnings_growth",
+  "total cash": "total_cash",
+  "total debt": "total_debt",
+  "total debt/equity": "debt_to_equity",
+  "current ratio": "current_ratio",
+  "book value per share": "book_value_per_share",
+  "operating cash flow": "operating_cash_flow",
+  "levered free cash flow": "free_cash_flow",
+  "shares outstanding": "shares_outstanding",
+  "forward annual dividend yield": "dividend_yield",
+  "payout ratio": "payout_ratio",
+  "short ratio": "short_ratio",
+}
+
+_MISSING = {"", "--", "-", "n/a", "na"}
+
+
+def _label(cell):
+  """Field-table form of a row label: lowercase, qualifiers like (ttm) and trailing footnote numbers removed"""
+  label = re.sub(r"\([^)]*\)", " ", cell.lower())
+  label = re.sub(r"\s+\d+$", "", " ".join(label.replace("*", "").split()))
+  return label.strip()
+
+
+def parse_key_statistics(markdown):
+  """Extract {field: value} from the markdown tables of a key-statistics page.
+
+  Values are taken from the first value column (the current period) and kept
+  as Yahoo formats them (e.g. "3.40T", "24.30%"). Unknown rows are ignored.
+  """
+  stats = {}
+  for line in markdown.splitlines():
+    line = line.strip()
+    if not line.startswith("|"):
+      continue
+    cells = [cell.strip() for cell in line.strip("|").split("|")]
+    if len(cells) < 2:
+      continue
+    field = FIELDS.get(_label(cells[0]))
+    value = cells[1]
+    if field and field not in stats and value.lower() not in _MISSING:
+      stats[field] = value
+  return stats
+
+
+def scrape_markdown(url):
+  """Scrape one page through Firecrawl and return its main content as markdown"""
+  headers = {"Authorization": f"Bearer {os.getenv('FIRECRAWL_API_KEY', '')}"}
+  body = {"url": url, "formats": ["markdown"], "onlyMainContent": True}
+  response = clients.request("POST", f"{FIRECRAWL_API_URL}/v1/scrape", json=body, headers=headers, timeout=60, provider="firecrawl")
+  data = response.json()
+  if not data.get("success"):
+    raise ValueError(data.get("error") or "Firecrawl scrape failed")
+  return (data.get("data") or {}).get("markdown") or ""
+
+
+@lru_cache(maxsize=None)
+def disk_cache():
+  """ResultCache at KEY_STATS_CACHE (default: a file in the temp dir), or None when set to 'off'"""
+  path = os.getenv("KEY_STATS_CACHE", os.path.join(tempfile.gettempdir(), "overclock-key-stats.db"))
+  if not path or path.lower() == "off":
+    return None
+  return result_cache.ResultCache(path)
+
+
+def fetch_key_statistics(tickers):
+  """Load {ticker: stats} for uppercase tickers from the disk cache, scraping the ones it lacks"""
+  disk = disk_cache()
+  loaded = {}
+  for ticker in tickers:
+    key = result_cache.make_key("key_statistics", {"ticker": ticker})
+    cached = disk.get(key) if disk is not None else None
+    if cached is not None:
+      loaded[ticker] = json.loads(cached)
+      continue
+    stats = parse_key_statistics(scrape_markdown(KEY_STATS_URL.format(ticker=ticker)))
+    if not stats:
+      continue
+    loaded[ticker] = stats
+    if disk is not None:
+      disk.set(key, json.dumps(stats), CACHE_TTL)
+  return loaded
+
+
+def get_key_statistics(ticker: str) -> str:
+  """Get key statistics (valuation, profitability, balance sheet, trading and dividend figures) for a stock ticker from Yahoo Finance, e.g. get_key_statistics('AAPL')."""
+  ticker = ticker.strip().upper().lstrip("$").replace(".", "-")
+  if not ticker:
+    return "Error: No ticker provided. Pass a stock ticker e.g. AAPL."
+  try:
+    stats = key_stats_cache.get_many([ticker], fetch_key_statistics).get(ticker)
+  except Exception as e:
+    return f"Error: key statistics request failed ({e}). Report to user: unable to fetch financial information; try again later."
+  if not stats:
+    return f"Error: No key statistics found for '{ticker}'. Report to user: check the ticker."
+  return json.dumps({"ticker": ticker, "source": KEY_STATS_URL.format(ticker=ticker), "stats": stats}, separators=(",", ":"))
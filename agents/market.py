@@ -0,0 +1,85 @@
+import json
+import math
+import os
+
+# Compact market data for the model. CoinGecko's /coins/markets rows carry
+# dozens of fields (image URLs, roi, ath dates, fully diluted valuation) that
+# the market agent never reads. MarketSnapshot keeps the few it does as typed
+# attributes, with the raw row still attached for Python callers, and
+# format_snapshots renders a projection of them as a table or minified JSON.
+
+# Snapshot attribute -> /coins/markets key, where the names differ
+SOURCE_KEYS = {
+  "price": "current_price",
+  "change_24h": "price_change_percentage_24h",
+  "volume_24h": "total_volume",
+  "rank": "market_cap_rank",
+  "ath_change": "ath_change_percentage",
+}
+
+DEFAULT_FIELDS = ("symbol", "name", "price", "change_24h", "market_cap", "volume_24h", "high_24h", "low_24h")
+
+
+class MarketSnapshot:
+  """One coin from /coins/markets: the fields the agents use, plus the raw row"""
+
+  __slots__ = ("id", "symbol", "name", "price", "change_24h", "market_cap", "rank", "volume_24h",
+               "high_24h", "low_24h", "circulating_supply", "ath", "ath_change", "last_updated", "raw")
+
+  def __init__(self, coin):
+    for field in self.__slots__[:-1]:
+      setattr(self, field, coin.get(SOURCE_KEYS.get(field, field)))
+    self.symbol = str(self.symbol or "").upper()
+    self.raw = coin
+
+  def __repr__(self):
+    return f"MarketSnapshot({self.symbol}, price={self.price})"
+
+  def project(self, fields=None):
+    """Return {field: value} for the given fields (default: FIELDS)"""
+    return {field: getattr(self, field) for field in fields or FIELDS}
+
+
+def fields_from(spec):
+  """Parse a comma-separated field list, rejecting names MarketSnapshot doesn't have"""
+  fields = tuple(f.strip() for f in spec.split(",") if f.strip())
+  unknown = [f for f in fields if f not in MarketSnapshot.__slots__ or f == "raw"]
+  if unknown:
+    raise ValueError(f"unknown market fields: {', '.join(unknown)}")
+  return fields
+
+
+# Fields and format the market tool sends to the model
+FIELDS = fields_from(os.getenv("COINGECKO_FIELDS", ",".join(DEFAULT_FIELDS)))
+FORMAT = os.getenv("COINGECKO_FORMAT", "table")
+
+
+def _round(value):
+  """Round floats to 6 significant digits; other values pass through"""
+  if isinstance(value, float):
+    return None if math.isnan(value) else float(f"{value:.6g}")
+  return value
+
+
+def _short(value):
+  """Table cell text: large numbers with K/M/B/T suffixes, blanks for missing values"""
+  if value is None:
+    return ""
+  if isinstance(value, (int, float)) and not isinstance(value, bool):
+    for scale, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M")):
+      if abs(value) >= scale:
+        return f"{value / scale:.4g}{suffix}"
+    return f"{value:.6g}"
+  return str(value).replace("|", "/")
+
+
+def format_snapshots(snapshots, fields=None, fmt=None):
+  """Render snapshots for the model as a pipe-separated table (default) or minified JSON rows"""
+  fields = fields or FIELDS
+  fmt = fmt or FORMAT
+  if fmt == "json":
+    rows = [{k: _round(v) for k, v in s.project(fields).items()} for s in snapshots]
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+  lines = ["|".join(fields)]
+  lines += ["|".join(_short(getattr(s, field)) for field in fields) for s in snapshots]
+  return "\n".join(lines)
@@ -0,0 +1,336 @@
+import argparse
+import importlib
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, as_completed
+from multiprocessing import connection, get_context
+
+import fanout
+import ratelimit
+import registry
+import result_cache
+import tracing
+
+# Process pool for running many team analyses at once. A team run spends a lot
+# of CPU in one interpreter (prompt assembly, JSON parsing, markdown), so past a
+# handful of concurrent analyses threads stop helping. Each worker process
+# builds its teams once at startup (registry.warm) and then runs jobs one at a
+# time; the parent hands jobs to idle workers over a pipe per worker. A job
+# that runs past its timeout or is cancelled while running has its worker
+# terminated and replaced, so a stuck run never holds a core. Workers share the
+# host-wide rate limit buckets and, when AGENT_RESULT_CACHE is set, the result
+# cache. Results come back in submission order (map) or as they finish
+# (map(..., ordered=False)).
+
+WORKERS = int(os.getenv("POOL_WORKERS", "0")) or os.cpu_count() or 4
+JOB_TIMEOUT = float(os.getenv("POOL_JOB_TIMEOUT", "600"))
+
+# "spawn" starts each worker from a clean interpreter; forking a parent with live
+# model clients and threads is not safe
+START_METHOD = os.getenv("POOL_START_METHOD", "spawn")
+
+# team -> script module whose registry entries a worker warms
+TEAM_MODULES = {"crypto": "crypto", "travel": "travel", "stocks": "stocks", "weather": "agent"}
+
+
+def _crypto_job(details, parallel, member_timeout):
+  import crypto
+  details = {**details, 'timeframe': (details.get('timeframe') or "daily").lower(), 'goal': (details.get('goal') or "").lower()}
+  ttl = crypto.RESULT_CACHE_TTLS.get(details['timeframe'], crypto.RESULT_CACHE_TTLS["daily"])
+  return lambda: crypto.run_analysis(details, parallel, member_timeout), crypto.result_cache_key(details), ttl
+
+
+def _travel_job(details, parallel, member_timeout):
+  import travel
+  details = {'transport_mode': "", 'days': "", 'description': "", **details}
+  return lambda: travel.run_plan(details, parallel, member_timeout), travel.result_cache_key(details), travel.RESULT_CACHE_TTL
+
+
+def _stocks_job(details, parallel, member_timeout):
+  import stocks
+  company = details['company']
+  return lambda: stocks.run_analysis(company), stocks.result_cache_key(company), stocks.RESULT_CACHE_TTL
+
+
+def _weather_job(details, parallel, member_timeout):
+  return lambda: fanout.checked_content(registry.get("agent.team").run(details['question'])), None, None
+
+
+# team -> builder of (run, result cache key, ttl) for one job
+JOBS = {"crypto": _crypto_job, "travel": _travel_job, "stocks": _stocks_job, "weather": _weather_job}
+
+
+def run_job(team, details, parallel=False, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT, cache=None, priority="batch"):
+  """Run one analysis in this process and return {status, report, seconds}"""
+  start = time.perf_counter()
+  try:
+    run, key, ttl = JOBS[team](details, parallel, member_timeout)
+    with tracing.trace_run(team, **details), ratelimit.priority(priority):
+      if cache is not None and key is not None:
+        report, _ = result_cache.run_cached(cache, key, ttl, run)
+      else:
+        report = run()
+    status = "ok"
+  except fanout.RunFailed as e:
+    status, report = "error", e.content
+  except Exception as e:
+    status, report = "error", f"Failed: {e}"
+  return {"status": status, "report": report, "seconds": round(time.perf_counter() - start, 3)}
+
+
+def _worker(conn, teams, member_timeout, priority):
+  """Worker process: warm the teams, then run jobs from conn until it sends None"""
+  try:
+    for team in teams:
+      importlib.import_module(TEAM_MODULES[team])
+      registry.warm(TEAM_MODULES[team])
+    cache = result_cache.open_result_cache()
+    conn.send(("ready", None, None))
+    while True:
+      item = conn.recv()
+      if item is None:
+        break
+      job_id, team, details, parallel = item
+      conn.send(("done", job_id, run_job(team, details, parallel, member_timeout, cache, priority)))
+  except (KeyboardInterrupt, EOFError):
+    pass
+
+
+class WorkerPool:
+  """Warm worker processes running team analyses, with per-job timeouts and cancellation.
+
+  submit() returns a concurrent.futures.Future whose result is a dict with
+  team, details, status (ok, error, timeout or cancelled), report, seconds and
+  worker. Failures are reported in the result rather than raised.
+  """
+
+  def __init__(self, workers=WORKERS, teams=None, timeout=JOB_TIMEOUT, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT, priority="batch"):
+    self.teams = list(teams or TEAM_MODULES)
+    unknown = [team for team in self.teams if team not in TEAM_MODULES]
+    if unknown:
+      raise ValueError(f"unknown teams {unknown}")
+    self.timeout = timeout
+    self.member_timeout = member_timeout
+    self.priority = priority
+    self._ctx = get_context(START_METHOD)
+    self._lock = threading.Lock()
+    self._ids = itertools.count()
+    self._workers = {}
+    self._pending = deque()
+    self._jobs = {}
+    self._futures = {}
+    self._stopped = []
+    self._closed = False
+    for _ in range(workers):
+      self._start_worker()
+    self._dispatcher = threading.Thread(target=self._dispatch, name="pool-dispatch", daemon=True)
+    self._dispatcher.start()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close(cancel=exc[0] is not None)
+
+  def _start_worker(self):
+    worker_id = next(self._ids)
+    parent, child = self._ctx.Pipe()
+    process = self._ctx.Process(
+      target=_worker, args=(child, self.teams, self.member_timeout, self.priority),
+      name=f"pool-worker-{worker_id}", daemon=True,
+    )
+    process.start()
+    child.close()
+    self._workers[worker_id] = {"process": process, "conn": parent, "ready": False, "job": None}
+
+  def _stop_worker(self, worker_id, replace=True):
+    """Terminate a worker (mid-job) and start a warm replacement; _reap() waits for it outside the lock"""
+    worker = self._workers.pop(worker_id)
+    worker["process"].terminate()
+    self._stopped.append(worker)
+    if replace and not self._closed:
+      self._start_worker()
+
+  def _reap(self):
+    """Wait for terminated workers to exit and close their pipes; call without holding the lock"""
+    with self._lock:
+      stopped, self._stopped = self._stopped, []
+    for worker in stopped:
+      worker["process"].join(5)
+      if worker["process"].is_alive():
+        worker["process"].kill()
+        worker["process"].join()
+      worker["conn"].close()
+
+  def submit(self, team, details, parallel=False, timeout=None):
+    """Queue one analysis ({"assets", ...} for crypto, {"company"} for stocks, ...) and return its Future"""
+    if team not in self.teams:
+      raise ValueError(f"team '{team}' isn't served by this pool")
+    future = Future()
+    with self._lock:
+      if self._closed:
+        raise RuntimeError("pool is closed")
+      job_id = next(self._ids)
+      self._jobs[job_id] = {"future": future, "team": team, "details": details, "parallel": parallel,
+                            "timeout": timeout or self.timeout, "worker": None, "started": None}
+      self._futures[future] = job_id
+      self._pending.append(job_id)
+    return future
+
+  def map(self, jobs, ordered=True, timeout=None):
+    """Run (team, details[, parallel]) jobs and yield their results in submission order, or as they finish"""
+    futures = [self.submit(*job, timeout=timeout) for job in jobs]
+    yield from (future.result() for future in (futures if ordered else as_completed(futures)))
+
+  def cancel(self, future):
+    """Cancel a job: drop it if it hasn't started, stop its worker if it has; False if it already finished"""
+    with self._lock:
+      job_id = self._futures.get(future)
+      if job_id is None or future.done():
+        return False
+      job = self._jobs[job_id]
+      if job["worker"] is None:
+        self._finish(job_id, "cancelled", "Cancelled before it started.")
+        return True
+      self._finish(job_id, "cancelled", "Cancelled while running.")
+      self._stop_worker(job["worker"])
+    self._reap()
+    return True
+
+  def _forget(self, job_id):
+    job = self._jobs.pop(job_id)
+    self._futures.pop(job["future"], None)
+    if job_id in self._pending:
+      self._pending.remove(job_id)
+    return job
+
+  def _finish(self, job_id, status, report, seconds=None):
+    job = self._forget(job_id)
+    if job["worker"] in self._workers:
+      self._workers[job["worker"]]["job"] = None
+    if seconds is None:
+      seconds = round(time.monotonic() - job["started"], 3) if job["started"] else 0.0
+    job["future"].set_result({
+      "team": job["team"], "details": job["details"], "status": status,
+      "report": report, "seconds": seconds, "worker": job["worker"],
+    })
+
+  def _dispatch(self):
+    """Hand pending jobs to idle workers, collect results, and enforce timeouts"""
+    while True:
+      with self._lock:
+        if self._closed and not self._jobs:
+          return
+        conns = {worker["conn"]: worker_id for worker_id, worker in self._workers.items()}
+        sentinels = {worker["process"].sentinel: worker_id for worker_id, worker in self._workers.items()}
+      ready = connection.wait([*conns, *sentinels], timeout=0.1)
+      with self._lock:
+        for worker_id in {conns.get(handle, sentinels.get(handle)) for handle in ready}:
+          worker = self._workers.get(worker_id)
+          if worker is None:
+            continue
+          try:
+            while worker["conn"].poll():
+              kind, job_id, result = worker["conn"].recv()
+              worker["ready"] = True
+              if kind == "done" and job_id in self._jobs:
+                self._finish(job_id, result["status"], result["report"], result["seconds"])
+          except (EOFError, OSError):
+            pass
+          if not worker["process"].is_alive():
+            if worker["job"] is not None and worker["job"] in self._jobs:
+              self._finish(worker["job"], "error", f"Worker exited with code {worker['process'].exitcode}.")
+            # A worker that died before it was ready (e.g. a team failed to build) isn't restarted
+            self._stop_worker(worker_id, replace=worker["ready"])
+        if not self._workers:
+          for job_id in list(self._pending):
+            self._finish(job_id, "error", "No worker process is available.")
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+          if job["started"] is not None and now - job["started"] > job["timeout"]:
+            worker_id = job["worker"]
+            self._finish(job_id, "timeout", f"No result within {job['timeout']:g}s.")
+            self._stop_worker(worker_id)
+        for worker_id, worker in list(self._workers.items()):
+          while worker["ready"] and worker["job"] is None and self._pending:
+            job_id = self._pending.popleft()
+            job = self._jobs[job_id]
+            # A job put back after a failed send is already running
+            if not job["future"].running() and not job["future"].set_running_or_notify_cancel():
+              self._forget(job_id)
+              continue
+            job["worker"], job["started"] = worker_id, time.monotonic()
+            worker["job"] = job_id
+            try:
+              worker["conn"].send((job_id, job["team"], job["details"], job["parallel"]))
+            except (BrokenPipeError, EOFError, OSError):
+              # The worker went away between polls: put the job back first in line and replace the worker
+              job["worker"], job["started"] = None, None
+              self._pending.appendleft(job_id)
+              self._stop_worker(worker_id)
+              break
+            except Exception as e:
+              # Details that can't be pickled never reach the pipe, so the worker stays usable
+              self._finish(job_id, "error", f"Failed: could not send the job to a worker: {e}")
+      self._reap()
+
+  def close(self, cancel=False):
+    """Stop accepting jobs, wait for queued ones (or cancel them all), then shut the workers down"""
+    with self._lock:
+      self._closed = True
+    if cancel:
+      for future in list(self._futures):
+        self.cancel(future)
+    self._dispatcher.join()
+    self._reap()
+    for worker in self._workers.values():
+      try:
+        worker["conn"].send(None)
+      except (BrokenPipeError, OSError):
+        pass
+    for worker in self._workers.values():
+      worker["process"].join(5)
+      if worker["process"].is_alive():
+        worker["process"].terminate()
+      worker["conn"].close()
+    self._workers.clear()
+
+
+def load_jobs(path):
+  """Read (team, details, parallel) jobs from JSONL: {"team": "crypto", "parallel": true, "assets": "btc", ...}"""
+  jobs = []
+  with open(path) as f:
+    for line in f:
+      if line.strip():
+        row = json.loads(line)
+        team = row.pop("team")
+        parallel = bool(row.pop("parallel", False))
+        jobs.append((team, row, parallel))
+  return jobs
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Run a file of team analyses on a pool of worker processes")
+  parser.add_argument("jobs", help="JSONL file, one job per line: team, optional parallel, and the team's details")
+  parser.add_argument("--workers", type=int, default=WORKERS, help=f"worker processes (default {WORKERS})")
+  parser.add_argument("--timeout", type=float, default=JOB_TIMEOUT, help="seconds before a running job is stopped")
+  parser.add_argument("--member-timeout", type=float, default=fanout.DEFAULT_MEMBER_TIMEOUT, help="seconds to wait for each member in parallel jobs")
+  parser.add_argument("--unordered", action="store_true", help="write results as they finish instead of in file order")
+  parser.add_argument("--output", help="JSONL results file (default: stdout)")
+  args = parser.parse_args()
+  jobs = load_jobs(args.jobs)
+  out = open(args.output, "w") if args.output else sys.stdout
+  try:
+    with WorkerPool(args.workers, teams={team for team, _, _ in jobs}, timeout=args.timeout, member_timeout=args.member_timeout) as pool:
+      futures = {pool.submit(*job): index for index, job in enumerate(jobs)}
+      for future in (as_completed(futures) if args.unordered else futures):
+        out.write(json.dumps({"index": futures[future], **future.result()}) + "\n")
+        out.flush()
+  finally:
+    if out is not sys.stdout:
+      out.close()
@@ -0,0 +1,303 @@
+import argparse
+import heapq
+import itertools
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import tracing
+
+# Host-wide scheduler for outbound tool calls. Each provider (CoinGecko,
+# Firecrawl, DDGS) has a token bucket kept in a SQLite file, so every worker
+# process on the host draws from the same budget. A call takes a token before
+# it is sent and waits for one when the bucket is empty instead of failing; a
+# 429 empties the bucket until the provider's Retry-After has passed. Waiting
+# calls queue by priority: interactive runs go before batch (watchlist) runs,
+# in this process through a priority queue and across processes because a
+# waiting interactive call marks the bucket and batch calls leave it alone.
+# Queue depth and wait time are available from stats() and trace spans.
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# provider -> "calls/seconds"; the bucket holds `calls` tokens and refills at calls/seconds per second
+DEFAULT_LIMITS = {"coingecko": "30/60", "firecrawl": "10/60", "ddgs": "30/60"}
+
+# agno toolkit functions that call a provider without going through clients.py
+TOOL_PROVIDERS = {"web_search": "ddgs", "search_news": "ddgs"}
+
+MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "300"))
+
+# A waiting interactive call retries at least once per refill interval (capped at 1s); batch
+# calls stay off its bucket for that long plus this margin after its last attempt
+INTERACTIVE_MARGIN = 0.25
+
+_priority = ContextVar("rate_limit_priority", default="interactive")
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class RateLimitTimeout(Exception):
+  """No capacity for a provider within the caller's maximum wait"""
+
+
+def parse_limit(spec):
+  """Parse "calls/seconds" into (rate per second, capacity), or None for "off" """
+  if not spec or spec.strip().lower() == "off":
+    return None
+  calls, _, seconds = spec.partition("/")
+  calls, seconds = float(calls), float(seconds or 1)
+  if calls <= 0 or seconds <= 0:
+    raise ValueError(f"invalid rate limit '{spec}'")
+  return calls / seconds, calls
+
+
+def limits_from_env():
+  """{provider: (rate, capacity)} from DEFAULT_LIMITS overridden by RATE_LIMIT_<PROVIDER>"""
+  limits = {}
+  for provider, default in DEFAULT_LIMITS.items():
+    limit = parse_limit(os.getenv(f"RATE_LIMIT_{provider.upper()}", default))
+    if limit is not None:
+      limits[provider] = limit
+  return limits
+
+
+class BucketStore:
+  """Token buckets in SQLite: a file shared by every process on the host, or ':memory:' for one process"""
+
+  def __init__(self, path):
+    self.path = path
+    self._shared = None
+    self._lock = threading.Lock()
+    if path == ":memory:":
+      self._shared = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    else:
+      conn = sqlite3.connect(path, timeout=30)
+      try:
+        conn.execute("PRAGMA journal_mode=WAL")
+      finally:
+        conn.close()
+    with self._connect() as conn:
+      conn.execute(
+        "CREATE TABLE IF NOT EXISTS buckets ("
+        " provider TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL,"
+        " blocked_until REAL NOT NULL DEFAULT 0, interactive_at REAL NOT NULL DEFAULT 0,"
+        " calls INTEGER NOT NULL DEFAULT 0, waited INTEGER NOT NULL DEFAULT 0,"
+        " wait_ms REAL NOT NULL DEFAULT 0, limited INTEGER NOT NULL DEFAULT 0)"
+      )
+
+  @contextmanager
+  def _connect(self):
+    """One write transaction; BEGIN IMMEDIATE serializes bucket updates across processes"""
+    if self._shared is not None:
+      with self._lock:
+        self._shared.execute("BEGIN IMMEDIATE")
+        try:
+          yield self._shared
+          self._shared.execute("COMMIT")
+        except BaseException:
+          self._shared.execute("ROLLBACK")
+          raise
+      return
+    conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+    try:
+      conn.execute("BEGIN IMMEDIATE")
+      try:
+        yield conn
+        conn.execute("COMMIT")
+      except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+      conn.close()
+
+  def _load(self, conn, provider, rate, capacity, now):
+    row = conn.execute(
+      "SELECT tokens, updated_at, blocked_until, interactive_at FROM buckets WHERE provider = ?", (provider,)
+    ).fetchone()
+    if row is None:
+      conn.execute("INSERT INTO buckets (provider, tokens, updated_at) VALUES (?, ?, ?)", (provider, capacity, now))
+      return capacity, 0.0, 0.0
+    tokens, updated_at, blocked_until, interactive_at = row
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate), blocked_until, interactive_at
+
+  def take(self, provider, rate, capacity, interactive, waited_ms=0.0):
+    """Take one token and return 0, or return the seconds to wait before trying again"""
+    now = time.time()
+    with self._connect() as conn:
+      tokens, blocked_until, interactive_at = self._load(conn, provider, rate, capacity, now)
+      if now < blocked_until:
+        wait = blocked_until - now
+      elif not interactive and now - interactive_at < min(1 / rate, 1.0) + INTERACTIVE_MARGIN:
+        wait = max(0.1, (1 - tokens) / rate)
+      elif tokens >= 1:
+        tokens -= 1
+        wait = 0.0
+      else:
+        wait = (1 - tokens) / rate
+      if wait and interactive:
+        interactive_at = now
+      conn.execute(
+        "UPDATE buckets SET tokens = ?, updated_at = ?, interactive_at = ?,"
+        " calls = calls + ?, waited = waited + ?, wait_ms = wait_ms + ? WHERE provider = ?",
+        (tokens, now, interactive_at, 0 if wait else 1, 1 if not wait and waited_ms >= 1 else 0, 0.0 if wait else waited_ms, provider),
+      )
+    return wait
+
+  def block(self, provider, rate, capacity, seconds):
+    """Empty the bucket and hold every caller off for seconds (after a 429)"""
+    now = time.time()
+    with self._connect() as conn:
+      self._load(conn, provider, rate, capacity, now)
+      conn.execute(
+        "UPDATE buckets SET tokens = 0, updated_at = ?, blocked_until = MAX(blocked_until, ?), limited = limited + 1"
+        " WHERE provider = ?", (now, now + seconds, provider),
+      )
+
+  def rows(self):
+    """Current bucket rows as dicts"""
+    with self._connect() as conn:
+      cursor = conn.execute("SELECT * FROM buckets ORDER BY provider")
+      columns = [c[0] for c in cursor.description]
+      return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+class Scheduler:
+  """Per-provider token buckets with an in-process priority queue in front of them"""
+
+  def __init__(self, limits, store):
+    self.limits = limits
+    self.store = store
+    self._cond = threading.Condition()
+    self._queues = {}
+    self._seq = itertools.count()
+    self._stats = {provider: {"queued": 0, "max_queued": 0, "calls": 0, "waited": 0, "wait_ms": 0.0, "max_wait_ms": 0.0, "limited": 0}
+                   for provider in limits}
+
+  def acquire(self, provider, priority=None, deadline=None):
+    """Block until provider has capacity for one call and return the seconds waited.
+
+    Unknown or unlimited providers return at once. Raises RateLimitTimeout if
+    no capacity frees up before deadline (a time.monotonic() value; default
+    MAX_WAIT from now).
+    """
+    limit = self.limits.get(provider)
+    if limit is None:
+      return 0.0
+    rate, capacity = limit
+    rank = PRIORITIES.get(priority or _priority.get(), 0)
+    start = time.monotonic()
+    deadline = deadline or start + MAX_WAIT
+    ticket = (rank, next(self._seq))
+    stats = self._stats[provider]
+    with self._cond:
+      queue = self._queues.setdefault(provider, [])
+      heapq.heappush(queue, ticket)
+      stats["queued"] = len(queue)
+      stats["max_queued"] = max(stats["max_queued"], len(queue))
+    try:
+      while True:
+        with self._cond:
+          while queue[0] != ticket:
+            if not self._cond.wait(max(0.0, deadline - time.monotonic())):
+              raise RateLimitTimeout(f"{provider}: no capacity within the maximum wait")
+        waited_ms = (time.monotonic() - start) * 1000
+        wait = self.store.take(provider, rate, capacity, rank == 0, waited_ms)
+        if not wait:
+          break
+        if time.monotonic() + wait > deadline:
+          raise RateLimitTimeout(f"{provider}: no capacity within the maximum wait")
+        time.sleep(min(wait, 1.0))
+    finally:
+      with self._cond:
+        queue.remove(ticket)
+        heapq.heapify(queue)
+        stats["queued"] = len(queue)
+        self._cond.notify_all()
+    waited = time.monotonic() - start
+    with self._cond:
+      stats["calls"] += 1
+      if waited >= 0.001:
+        stats["waited"] += 1
+        stats["wait_ms"] += waited * 1000
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], waited * 1000)
+    if waited >= 0.001:
+      tracing.incr("wait_ms", round(waited * 1000, 3))
+    return waited
+
+  def rate_limited(self, provider, retry_after=None):
+    """Record a 429 from provider: hold its bucket for retry_after (default: one token's refill time)"""
+    limit = self.limits.get(provider)
+    if limit is None:
+      return False
+    rate, capacity = limit
+    self.store.block(provider, rate, capacity, retry_after if retry_after is not None else 1 / rate)
+    with self._cond:
+      self._stats[provider]["limited"] += 1
+    return True
+
+  def stats(self):
+    """{provider: in-process queue depth, calls, waits and 429s}"""
+    with self._cond:
+      return {provider: {**stats, "wait_ms": round(stats["wait_ms"], 1), "max_wait_ms": round(stats["max_wait_ms"], 1)}
+              for provider, stats in self._stats.items()}
+
+
+def scheduler():
+  """The process-wide Scheduler, with buckets in RATE_LIMIT_DB (default: a file in the temp dir; "memory" for this process only)"""
+  global _scheduler
+  if _scheduler is None:
+    with _scheduler_lock:
+      if _scheduler is None:
+        path = os.getenv("RATE_LIMIT_DB", os.path.join(tempfile.gettempdir(), "overclock-rate-limits.db"))
+        _scheduler = Scheduler(limits_from_env(), BucketStore(":memory:" if path.lower() == "memory" else path))
+  return _scheduler
+
+
+def acquire(provider, deadline=None):
+  """Wait for capacity for one call to provider (see Scheduler.acquire)"""
+  return scheduler().acquire(provider, deadline=deadline) if provider else 0.0
+
+
+def rate_limited(provider, retry_after=None):
+  """Tell the scheduler provider answered 429; returns False if provider isn't scheduled"""
+  return scheduler().rate_limited(provider, retry_after) if provider else False
+
+
+def stats():
+  """In-process scheduler stats per provider"""
+  return scheduler().stats()
+
+
+@contextmanager
+def priority(name):
+  """Queue calls made inside the block at this priority ("interactive" or "batch")"""
+  if name not in PRIORITIES:
+    raise ValueError(f"unknown priority '{name}'")
+  token = _priority.set(name)
+  try:
+    yield
+  finally:
+    _priority.reset(token)
+
+
+def tool_hook(function_name, function_call, arguments):
+  """agno tool hook: schedule toolkit calls that reach a provider directly (e.g. DuckDuckGoTools)"""
+  acquire(TOOL_PROVIDERS.get(function_name))
+  return function_call(**arguments)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Show the host-wide rate limit buckets")
+  parser.parse_args()
+  sched = scheduler()
+  for row in sched.store.rows():
+    rate, capacity = sched.limits.get(row["provider"], (0, 0))
+    tokens = min(capacity, row["tokens"] + max(0.0, time.time() - row["updated_at"]) * rate) if rate else row["tokens"]
+    blocked = max(0.0, row["blocked_until"] - time.time())
+    mean_wait = row["wait_ms"] / row["waited"] if row["waited"] else 0.0
+    print(f"{row['provider']}: tokens {tokens:.1f}/{capacity:g}, calls {row['calls']}, waited {row['waited']}"
+          f" (mean {mean_wait:.0f} ms), 429s {row['limited']}" + (f", blocked {blocked:.1f}s" if blocked else ""))
@@ -0,0 +1,55 @@
+import threading
+
+# Lazy registry for agents and teams. Scripts register a factory per object
+# ("crypto.team", "travel.weather_agent") instead of building it at import, so
+# importing a script for its helpers (briefs, detail collection, cache keys)
+# doesn't load agno or create model clients. get() builds an object on first
+# use and every later caller in the process shares it. Each script's module
+# __getattr__ comes from module_getattr(), so `crypto.team` and friends keep
+# working as plain attributes.
+
+_factories = {}
+_instances = {}
+# Reentrant: a team's factory gets its members while the team is being built
+_lock = threading.RLock()
+
+
+def factory(name):
+  """Decorator registering fn as the builder of name"""
+  def register(fn):
+    _factories[name] = fn
+    return fn
+  return register
+
+
+def get(name):
+  """Return the object registered as name, building it on first use"""
+  instance = _instances.get(name)
+  if instance is not None:
+    return instance
+  if name not in _factories:
+    raise KeyError(f"nothing registered as '{name}'")
+  with _lock:
+    if name not in _instances:
+      _instances[name] = _factories[name]()
+    return _instances[name]
+
+
+def names(prefix):
+  """Registered names under prefix ("crypto" -> "crypto.team", "crypto.market_agent", ...)"""
+  return [name for name in _factories if name.startswith(f"{prefix}.")]
+
+
+def warm(prefix):
+  """Build everything registered under prefix now (e.g. at server startup) and return {name: object}"""
+  return {name: get(name) for name in names(prefix)}
+
+
+def module_getattr(prefix):
+  """Module __getattr__ resolving attribute x to the object registered as "<prefix>.x" """
+  def __getattr__(attr):
+    name = f"{prefix}.{attr}"
+    if name not in _factories:
+      raise AttributeError(f"module '{prefix}' has no attribute '{attr}'")
+    return get(name)
+  return __getattr__
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+# Opt-in on-disk cache of whole team analyses. Entries are keyed on the
+# normalized request details, expire after a per-request TTL and are evicted
+# least-recently-used first once the store grows past max_bytes. SQLite in WAL
+# mode lets several worker processes on one host share the same file.
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def make_key(team_name, details):
+  """Stable cache key for a team and its normalized details"""
+  payload = json.dumps({"team": team_name, **details}, sort_keys=True, separators=(",", ":"))
+  return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+  """SQLite-backed TTL cache for team results, shared across processes"""
+
+  def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+    self.path = path
+    self.max_bytes = max_bytes
+    with self._connect() as conn:
+      conn.execute("PRAGMA journal_mode=WAL")
+      conn.execute(
+        "CREATE TABLE IF NOT EXISTS results ("
+        " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+        " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+      )
+      conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+
+  @contextmanager
+  def _connect(self):
+    """Open a connection for one operation; commits on success and always closes"""
+    conn = sqlite3.connect(self.path, timeout=30)
+    try:
+      with conn:
+        yield conn
+    finally:
+      conn.close()
+
+  def get(self, key):
+    """Return the cached value for key, or None if missing or expired"""
+    now = time.time()
+    with self._connect() as conn:
+      row = conn.execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+      if row is None:
+        return None
+      if row[1] <= now:
+        conn.execute("DELETE FROM results WHERE key = ?", (key,))
+        return None
+      conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+      return row[0]
+
+  def set(self, key, value, ttl):
+    """Store value under key for ttl seconds, then evict down to max_bytes"""
+    now = time.time()
+    with self._connect() as conn:
+      conn.execute(
+        "INSERT OR REPLACE INTO results (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+        (key, value, len(value.encode()), now + ttl, now),
+      )
+      self._evict(conn, now)
+
+  def _evict(self, conn, now):
+    """Drop expired entries, then least recently used ones until under max_bytes"""
+    conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+    if total <= self.max_bytes:
+      return
+    for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed_at").fetchall():
+      conn.execute("DELETE FROM results WHERE key = ?", (key,))
+      total -= size
+      if total <= self.max_bytes:
+        break
+
+  def stats(self):
+    """Return entry count and total stored bytes"""
+    with self._connect() as conn:
+      count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+    return {"entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+
+def open_result_cache():
+  """Return the ResultCache configured by AGENT_RESULT_CACHE, or None if caching is off"""
+  path = os.getenv("AGENT_RESULT_CACHE")
+  if not path:
+    return None
+  max_mb = float(os.getenv("AGENT_RESULT_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024)))
+  return ResultCache(path, max_bytes=int(max_mb * 1024 * 1024))
+
+
+def run_cached(cache, key, ttl, run):
+  """Return (content, hit): the cached result for key, or run() stored for ttl seconds.
+
+  Nothing is stored when run() raises, e.g. fanout.RunFailed for a failed run.
+  """
+  if cache is not None:
+    content = cache.get(key)
+    if content is not None:
+      return content, True
+  content = run()
+  if cache is not None and content:
+    cache.set(key, content, ttl)
+  return content, False
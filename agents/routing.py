@@ -0,0 +1,156 @@
+import argparse
+import importlib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import tracing
+
+# Model routing. Every agent and coordinator has a role ("crypto.market_agent",
+# "travel.coordinator") that models.json maps to a list of named models: the
+# first one serves the role and the rest are tried in order when it times out,
+# is rate limited or fails with a server error. Coordinators and synthesis
+# agents keep the strong models; members that extract or summarize tool output
+# run on small fast ones. Model prices from the config put a cost on every
+# model span in a trace, and `python routing.py report traces.jsonl` turns a
+# trace file into per-role latency, tokens, cost and fallbacks for tuning.
+
+CONFIG_PATH = Path(os.getenv("AGENT_MODELS_CONFIG") or Path(__file__).parent / "models.json")
+
+# provider -> (agno model class, API key variable a fallback on that provider needs).
+# Classes are imported when a model is first built; agno's model modules are slow to load.
+PROVIDERS = {
+  "openrouter": ("agno.models.openrouter:OpenRouter", "OPENROUTER_API_KEY"),
+  "xai": ("agno.models.xai:xAI", "XAI_API_KEY"),
+  "openai": ("agno.models.openai:OpenAIChat", "OPENAI_API_KEY"),
+}
+
+
+def model_class(provider):
+  """Import and return the agno model class for provider"""
+  module, _, name = PROVIDERS[provider][0].partition(":")
+  return getattr(importlib.import_module(module), name)
+
+
+@lru_cache(maxsize=None)
+def load_config(path=CONFIG_PATH):
+  """Parse and check the routing config, registering its model prices with tracing"""
+  config = json.loads(Path(path).read_text())
+  models = config["models"]
+  for name, spec in models.items():
+    if spec.get("provider") not in PROVIDERS:
+      raise ValueError(f"{path}: model '{name}' has unknown provider '{spec.get('provider')}'")
+  for role, names in config["roles"].items():
+    unknown = [name for name in names if name not in models]
+    if not names or unknown:
+      raise ValueError(f"{path}: role '{role}' needs known models, got {names}")
+  if "default" not in config["roles"]:
+    raise ValueError(f"{path}: no 'default' role")
+  tracing.set_prices({spec["id"]: tuple(spec["price"]) for spec in models.values() if spec.get("price")})
+  return config
+
+
+def build_model(name, config=None):
+  """Instantiate the named model with its timeout, retry count and provider options"""
+  config = config or load_config()
+  spec = config["models"][name]
+  return model_class(spec["provider"])(
+    id=spec["id"],
+    timeout=spec.get("timeout", config.get("timeout")),
+    max_retries=spec.get("max_retries", config.get("max_retries")),
+    **spec.get("options", {}),
+  )
+
+
+def models_for(role):
+  """Model names configured for role (the default role's when it has none)"""
+  roles = load_config()["roles"]
+  return roles.get(role) or roles["default"]
+
+
+def on_fallback(primary_id, fallback_id, error):
+  """FallbackConfig callback: record the switch as a span of the current trace"""
+  with tracing.span(f"{primary_id} -> {fallback_id}", kind="fallback", reason=type(error).__name__):
+    pass
+
+
+def route(role):
+  """Agent/Team keyword arguments for role: model, plus fallback_config when it has fallbacks.
+
+  Fallbacks on a provider whose API key isn't set are left out, so a missing
+  key never replaces the primary model's error with an authentication error.
+  """
+  from agno.models.fallback import FallbackConfig
+
+  config = load_config()
+  names = models_for(role)
+  fallbacks = [
+    build_model(name, config) for name in names[1:]
+    if os.getenv(PROVIDERS[config["models"][name]["provider"]][1])
+  ]
+  kwargs = {"model": build_model(names[0], config)}
+  if fallbacks:
+    kwargs["fallback_config"] = FallbackConfig(on_error=fallbacks, on_rate_limit=list(fallbacks), callback=on_fallback)
+  return kwargs
+
+
+def _percentile(values, pct):
+  values = sorted(values)
+  return values[min(len(values) - 1, int(round((len(values) - 1) * pct / 100)))]
+
+
+def report(path):
+  """Aggregate a trace file's model spans per (run, agent): calls, p50/p90 ms, tokens, cost, fallbacks"""
+  rows = {}
+  fallbacks = {}
+  with open(path) as f:
+    for line in f:
+      record = json.loads(line)
+      if record.get("kind") == "fallback":
+        fallbacks[(record["run"], record["name"])] = fallbacks.get((record["run"], record["name"]), 0) + 1
+      if record.get("kind") != "model":
+        continue
+      attrs = record["attrs"]
+      row = rows.setdefault((record["run"], record["name"]), {
+        "run": record["run"], "role": record["name"], "models": set(), "ms": [],
+        "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0,
+      })
+      row["models"].add(str(attrs.get("model")))
+      row["ms"].append(record["ms"])
+      row["input_tokens"] += attrs.get("input_tokens") or 0
+      row["output_tokens"] += attrs.get("output_tokens") or 0
+      row["cost_usd"] += attrs.get("cost_usd") or 0
+  for row in rows.values():
+    row["calls"] = len(row["ms"])
+    row["p50_ms"] = round(_percentile(row["ms"], 50), 1)
+    row["p90_ms"] = round(_percentile(row["ms"], 90), 1)
+    row["models"] = ",".join(sorted(row["models"]))
+    row["cost_usd"] = round(row["cost_usd"], 4)
+  return sorted(rows.values(), key=lambda row: -row["cost_usd"]), fallbacks
+
+
+def format_report(rows, fallbacks):
+  """Render report() output as a plain-text table followed by fallback counts"""
+  columns = ("run", "role", "models", "calls", "p50_ms", "p90_ms", "input_tokens", "output_tokens", "cost_usd")
+  cells = [[str(row[c]) for c in columns] for row in rows]
+  widths = [max(len(c), *(len(r[i]) for r in cells)) if cells else len(c) for i, c in enumerate(columns)]
+  lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+  lines += ["  ".join(v.ljust(w) for v, w in zip(row, widths)) for row in cells]
+  for (run, switch), count in sorted(fallbacks.items()):
+    lines.append(f"fallback {run}: {switch} x{count}")
+  return "\n".join(lines)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Per-role model routing")
+  sub = parser.add_subparsers(dest="command", required=True)
+  sub.add_parser("roles", help="print each role's models")
+  report_parser = sub.add_parser("report", help="per-role latency and cost from an AGENT_TRACE_PATH file")
+  report_parser.add_argument("trace_file")
+  args = parser.parse_args()
+  if args.command == "roles":
+    for role, names in sorted(load_config()["roles"].items()):
+      print(f"{role}: {' -> '.join(names)}")
+  else:
+    print(format_report(*report(args.trace_file)))
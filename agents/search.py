@@ -0,0 +1,88 @@
+import json
+import os
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+
+import clients
+from cache import TTLCache
+
+# Shared web search layer for the news and sentiment tools. Near-identical
+# queries (case, spacing, $TICKER vs TICKER, today's date vs "today") hit one
+# cache entry, results a tool already returned earlier in the same run are
+# dropped by URL, and what goes back to the model is compact JSON with truncated
+# snippets. De-duplication is per tool: the news and sentiment agents each see
+# every result once, even when their searches overlap.
+
+SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "200"))
+MAX_CHARS = int(os.getenv("SEARCH_MAX_CHARS", "4000"))
+
+search_cache = TTLCache(
+  ttl=float(os.getenv("SEARCH_CACHE_TTL", "300")),
+  maxsize=int(os.getenv("SEARCH_CACHE_SIZE", "256")),
+)
+
+# {tool: URLs it already returned} during the current run; None outside a search_scope()
+_seen_urls = ContextVar("seen_urls", default=None)
+
+
+def normalize_query(query):
+  """Cache key form of a query: lowercase, single-spaced, no $ prefixes, today's date as 'today'"""
+  query = query.lower().replace(date.today().isoformat(), "today")
+  query = re.sub(r"\$(\w)", r"\1", query)
+  return " ".join(query.split())
+
+
+def cached_search(query, max_results=10):
+  """Return DDGS text results for query, sharing one search across equivalent queries"""
+  key = (normalize_query(query), max_results)
+  return search_cache.get_many([key], lambda keys: {key: clients.search_text(query, max_results=max_results) or []})[key]
+
+
+@contextmanager
+def search_scope():
+  """De-duplicate each tool's results by URL across its searches made inside this block"""
+  token = _seen_urls.set({})
+  try:
+    yield
+  finally:
+    _seen_urls.reset(token)
+
+
+def compact_results(results, max_chars=None, snippet_chars=None, reader=None):
+  """Serialize results as minified JSON, dropping repeated URLs and truncating snippets.
+
+  reader names the tool the results go to; only URLs that tool already got in
+  the current search_scope() are dropped. Returns "" for no results, or a note
+  if every result was already returned to reader earlier.
+  """
+  max_chars = MAX_CHARS if max_chars is None else max_chars
+  snippet_chars = SNIPPET_CHARS if snippet_chars is None else snippet_chars
+  if not results:
+    return ""
+  scope = _seen_urls.get()
+  seen = scope.setdefault(reader, set()) if scope is not None else None
+  local_seen = set()
+  compact = []
+  for result in results:
+    url = result.get("href") or result.get("url") or ""
+    if url and (url in local_seen or (seen is not None and url in seen)):
+      continue
+    local_seen.add(url)
+    body = " ".join((result.get("body") or "").split())
+    if len(body) > snippet_chars:
+      body = body[:snippet_chars].rstrip() + "…"
+    compact.append({"title": result.get("title", ""), "href": url, "body": body})
+  if not compact:
+    return "No new results; every result was already returned by an earlier search."
+
+  # Keep whole results only, up to the character budget (always at least one)
+  items = [json.dumps(r, ensure_ascii=False, separators=(",", ":")) for r in compact]
+  kept, size = 1, len(items[0]) + 2
+  while kept < len(items) and size + len(items[kept]) + 1 <= max_chars:
+    size += len(items[kept]) + 1
+    kept += 1
+  if seen is not None:
+    seen.update(r["href"] for r in compact[:kept] if r["href"])
+  return "[" + ",".join(items[:kept]) + "]"
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import uvicorn
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+import ratelimit
+import registry
+import streaming
+import tracing
+
+load_dotenv()
+
+# HTTP front-end for the agent teams. Teams are built once at startup and
+# shared by every request; each run executes on a bounded thread pool (agno's
+# tools and model clients are blocking) and its events are relayed to the
+# client as Server-Sent Events, so one process serves many concurrent sessions.
+
+MAX_WORKERS = int(os.getenv("SERVER_MAX_WORKERS", "16"))
+
+team_modules = {}
+executor = None
+
+
+class QuestionRequest(BaseModel):
+  question: str
+
+
+class CryptoRequest(BaseModel):
+  assets: str
+  timeframe: str = "daily"
+  goal: str = ""
+  parallel: bool = False
+
+
+class TripRequest(BaseModel):
+  destination: str
+  transport_mode: str = ""
+  departure_city: Optional[str] = None
+  days: str = ""
+  description: str = ""
+  parallel: bool = False
+
+
+class StocksRequest(BaseModel):
+  company: str
+
+
+@asynccontextmanager
+async def lifespan(app):
+  global executor
+  import agent
+  import crypto
+  import stocks
+  import travel
+  team_modules.update({"weather": agent, "crypto": crypto, "travel": travel, "stocks": stocks})
+  # Build every Agent/Team once up front, so the first request doesn't pay for it
+  for module in team_modules.values():
+    registry.warm(module.__name__)
+  executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="team-run")
+  asyncio.get_running_loop().set_default_executor(executor)
+  yield
+  executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="Overclock agent teams", lifespan=lifespan)
+
+
+def format_sse(name, data):
+  return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def relay(name, events):
+  """Trace a run's event stream and yield it as SSE messages.
+
+  Blocking team runs execute on the worker pool and stream back through a
+  bounded queue (see streaming.stream_team), so a slow client applies
+  backpressure to its run and a disconnect stops it.
+  """
+  with tracing.trace_run(name):
+    async for item in events:
+      yield format_sse(*item)
+
+
+def sse(stream):
+  return StreamingResponse(stream, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/health")
+async def health():
+  return {"status": "ok", "teams": sorted(team_modules)}
+
+
+@app.get("/ratelimits")
+async def ratelimits():
+  return ratelimit.stats()
+
+
+@app.post("/weather")
+async def weather(request: QuestionRequest):
+  return sse(relay("weather", streaming.stream_team(team_modules["weather"].team, request.question)))
+
+
+@app.post("/crypto")
+async def crypto_analysis(request: CryptoRequest):
+  crypto = team_modules["crypto"]
+  crypto_details = {'assets': request.assets, 'timeframe': request.timeframe.lower() or "daily", 'goal': request.goal.lower()}
+  return sse(relay("crypto", crypto.stream_analysis(crypto_details, parallel=request.parallel)))
+
+
+@app.post("/travel")
+async def travel_plan(request: TripRequest):
+  trip_details = request.model_dump(exclude_none=True, exclude={"parallel"})
+  return sse(relay("travel", team_modules["travel"].stream_plan(trip_details, parallel=request.parallel)))
+
+
+@app.post("/stocks")
+async def stocks_analysis(request: StocksRequest):
+  selected, query = team_modules["stocks"].select_team(request.company)
+  return sse(relay("stocks", streaming.stream_team(selected, query)))
+
+
+if __name__ == "__main__":
+  uvicorn.run(app, host=os.getenv("SERVER_HOST", "0.0.0.0"), port=int(os.getenv("SERVER_PORT", "8000")))
@@ -0,0 +1,102 @@
+import json
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import tracing
+from cache import TTLCache
+
+# Memory for one interactive session. A REPL follow-up ("same assets, goal
+# trade", "same trip but 5 days") usually changes the inputs of only some
+# members, so inside use() members whose brief is unchanged reuse their earlier
+# result in parallel mode and only the rest run again. Tool calls repeated with
+# the same arguments (market data, searches, weather lookups) return their
+# earlier result in every mode. Only successful results are kept, for
+# SESSION_MEMORY_TTL seconds; 0 turns session memory off. Tools over live data
+# cap how long their results are reused (see limit_tool_ttl).
+
+MEMORY_TTL = float(os.getenv("SESSION_MEMORY_TTL", str(15 * 60)))
+MEMORY_SIZE = int(os.getenv("SESSION_MEMORY_SIZE", "256"))
+
+# Tool results starting with these are failures or empty answers, which are worth retrying
+_UNCACHED_PREFIXES = ("Error", "No results", "No new results")
+
+# tool name -> most seconds a remembered result may be reused, set by the tool's module
+_tool_ttls = {}
+
+_memory = ContextVar("session_memory", default=None)
+
+
+def limit_tool_ttl(function_name, ttl):
+  """Reuse function_name's results for at most ttl seconds (its source cache's TTL); 0 never reuses them"""
+  _tool_ttls[function_name] = ttl
+
+
+class SessionMemory:
+  """Member results, synthesized reports and tool results from earlier runs in one session"""
+
+  def __init__(self, ttl=MEMORY_TTL, maxsize=MEMORY_SIZE):
+    self.members = TTLCache(ttl=ttl, maxsize=maxsize)
+    self.reports = TTLCache(ttl=ttl, maxsize=maxsize)
+    self.tools = TTLCache(ttl=ttl, maxsize=maxsize)
+
+  @staticmethod
+  def member_key(key, task, session_state):
+    """A member's result depends on its task and its brief in session_state"""
+    return (key, task, (session_state or {}).get(f"{key}_brief"))
+
+  def reuse(self, tasks, session_state):
+    """Return {key: result} for the {key: (agent, task)} members with a remembered result, marked reused"""
+    reused = {}
+    for key, (agent, task) in tasks.items():
+      result = self.members.get(self.member_key(key, task, session_state))
+      if result is not None:
+        reused[key] = {**result, "seconds": 0.0, "reused": True}
+    return reused
+
+  def remember(self, key, task, session_state, result):
+    """Keep a member's result for later runs if it succeeded"""
+    if result["status"] == "ok" and result["content"]:
+      self.members.set(self.member_key(key, task, session_state), result)
+
+  def clear(self):
+    """Forget everything remembered so far"""
+    for cache in (self.members, self.reports, self.tools):
+      cache.clear()
+
+
+def open_session_memory():
+  """SessionMemory for a REPL loop, or None when SESSION_MEMORY_TTL is 0"""
+  return SessionMemory() if MEMORY_TTL > 0 else None
+
+
+@contextmanager
+def use(memory):
+  """Make memory the current session's memory inside the block (None leaves it off)"""
+  token = _memory.set(memory)
+  try:
+    yield memory
+  finally:
+    _memory.reset(token)
+
+
+def current():
+  """The SessionMemory active in this context, or None"""
+  return _memory.get()
+
+
+def tool_hook(function_name, function_call, arguments):
+  """agno tool hook: return the session's earlier result for a repeated call with the same arguments"""
+  memory = _memory.get()
+  ttl = _tool_ttls.get(function_name)
+  if memory is None or ttl == 0:
+    return function_call(**arguments)
+  key = (function_name, json.dumps(arguments, sort_keys=True, default=str))
+  result = memory.tools.get(key)
+  if result is not None:
+    tracing.incr("cache_hits")
+    return result
+  result = function_call(**arguments)
+  if isinstance(result, str) and result and not result.startswith(_UNCACHED_PREFIXES):
+    memory.tools.set(key, result, None if ttl is None else min(ttl, memory.tools.ttl))
+  return result
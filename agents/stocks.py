@@ -1,59 +1,139 @@
+from datetime import date
 from typing import Iterator
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.team import Team
-from agno.models.xai import xAI
-from agno.tools.firecrawl import FirecrawlTools
+import compaction
+import fanout
+import keystats
+import registry
+import result_cache
+import routing
+import symbols
+import tracing
 
 load_dotenv()
 
-get_ticker_agent = Agent(
-  name="Get ticker agent",
-  role="Get the ticker of a given company",
-  model=xAI(id="grok-3"),
-  instructions=["Based on user input, get the ticker of the company. We will need the ticker of the company to get the basic financial information. We will be passing the ticker to the financial info agent."],
-  markdown=True,
-)
-
-financial_info_agent = Agent(
-  name="Financial info agent",
-  role="Get the basic financial information of a given company",
-  tools=[FirecrawlTools(enable_scrape=False, enable_crawl=True)],
-  instructions=[
-    "FIRST: use user input to get the company name and use the FirecrawlTools to get the basic financial information of the company. Go to finance.yahoo.com/quote/{{company_ticker}}/key-statistics to get the basic financial information of the company.",
-    "SECOND: use the function response to get the basic financial information of the company. And pass it to the analyst agent to analyze the financial information of the company."
-  ],
-  markdown=True,
-)
-
-news_agent = Agent(
-  name="News agent",
-  role="Get the news about a given company",
-  model=xAI(id="grok-3"),
-  instructions=["gather the news about a given company, keep it short and to the point. Only gather the latest news that seems relevant to the company."],
-  markdown=True,
-)
-
-analysis_agent = Agent(
-  name="Analysis agent",
-  role="Analyze the financial information of a given company",
-  model=xAI(id="grok-3"),
-  instructions=["Analyze the financial information from the financial_info_agent. Also analyze the news from the news_agent. Do not make any assumptions, only use the information provided to you, analyze the financial information of the company and make a conclusion based on the information provided."],
-  markdown=True,
-)
-
-team = Team(
-  members=[get_ticker_agent, financial_info_agent, news_agent, analysis_agent],
-  model=xAI(id="grok-3"),
-  instructions=["You are a team of agents that are tasked with getting the stocks of a given company. You will be passing the company name to the get_ticker_agent to get the ticker of the company. You will be passing the ticker to the financial_info_agent to get the basic financial information of the company. You will be passing the company name to the news_agent to get the news about the company. You will be passing all the information to the analysis_agent to analyze the financial information of the company."],
-  markdown=True,
-  show_members_responses=True,
-)
+
+@registry.factory("stocks.get_ticker_agent")
+def build_get_ticker_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Get ticker agent",
+    role="Get the ticker of a given company",
+    **routing.route("stocks.get_ticker_agent"),
+    instructions=["Based on user input, get the ticker of the company. We will need the ticker of the company to get the basic financial information. We will be passing the ticker to the financial info agent."],
+    markdown=True,
+  )
+
+
+@registry.factory("stocks.financial_info_agent")
+def build_financial_info_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Financial info agent",
+    role="Get the basic financial information of a given company",
+    tools=[keystats.get_key_statistics],
+    tool_hooks=[tracing.tool_hook],
+    **routing.route("stocks.financial_info_agent"),
+    instructions=[
+      "FIRST: use user input to get the ticker of the company and call get_key_statistics with it (e.g. get_key_statistics('AAPL')) to get the basic financial information of the company from its Yahoo Finance key-statistics page.",
+      "SECOND: use the function response to get the basic financial information of the company. And pass it to the analyst agent to analyze the financial information of the company."
+    ],
+    markdown=True,
+  )
+
+
+@registry.factory("stocks.news_agent")
+def build_news_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="News agent",
+    role="Get the news about a given company",
+    **routing.route("stocks.news_agent"),
+    instructions=["gather the news about a given company, keep it short and to the point. Only gather the latest news that seems relevant to the company."],
+    markdown=True,
+  )
+
+
+@registry.factory("stocks.analysis_agent")
+def build_analysis_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Analysis agent",
+    role="Analyze the financial information of a given company",
+    **routing.route("stocks.analysis_agent"),
+    instructions=["Analyze the financial information from the financial_info_agent. Also analyze the news from the news_agent. Do not make any assumptions, only use the information provided to you, analyze the financial information of the company and make a conclusion based on the information provided."],
+    markdown=True,
+  )
+
+
+@registry.factory("stocks.team")
+def build_team():
+  from agno.team import Team
+  return Team(
+    members=[registry.get(f"stocks.{name}") for name in ("get_ticker_agent", "financial_info_agent", "news_agent", "analysis_agent")],
+    **routing.route("stocks.coordinator"),
+    instructions=["You are a team of agents that are tasked with getting the stocks of a given company. You will be passing the company name to the get_ticker_agent to get the ticker of the company. You will be passing the ticker to the financial_info_agent to get the basic financial information of the company. You will be passing the company name to the news_agent to get the news about the company. You will be passing all the information to the analysis_agent to analyze the financial information of the company."],
+    markdown=True,
+    post_hooks=[tracing.run_hook],
+    show_members_responses=True,
+    compression_manager=compaction.manager("stocks"),
+  )
+
+
+# Used when the symbol index already resolved the ticker, so no model call is spent on it
+@registry.factory("stocks.resolved_team")
+def build_resolved_team():
+  from agno.team import Team
+  return Team(
+    members=[registry.get(f"stocks.{name}") for name in ("financial_info_agent", "news_agent", "analysis_agent")],
+    **routing.route("stocks.coordinator"),
+    instructions=["You are a team of agents that are tasked with analyzing the stock of a given company whose ticker is already known. The request gives the company name and its ticker. You will be passing the ticker to the financial_info_agent to get the basic financial information of the company. You will be passing the company name to the news_agent to get the news about the company. You will be passing all the information to the analysis_agent to analyze the financial information of the company."],
+    markdown=True,
+    post_hooks=[tracing.run_hook],
+    show_members_responses=True,
+    compression_manager=compaction.manager("stocks"),
+  )
+
+
+# Agents, teams and members are module attributes too (stocks.team), built on first access
+__getattr__ = registry.module_getattr("stocks")
+
+
+def select_team(company):
+  """Return (team, query): resolved_team with the ticker filled in when the symbol index knows the company, else the full team"""
+  match = symbols.stock_index().resolve(company)
+  if match is None:
+    return registry.get("stocks.team"), company
+  return registry.get("stocks.resolved_team"), f"{match.name} (ticker: {match.symbol})"
+
+
+def run_analysis(company):
+  """Analyze a company without printing and return the analysis; raises fanout.RunFailed if it failed"""
+  selected, query = select_team(company)
+  return fanout.checked_content(selected.run(query))
+
+
+# Cached analyses last an hour; news and key statistics move during the day
+RESULT_CACHE_TTL = 60 * 60
+
+
+def result_cache_key(company):
+  """Result cache key: normalized company name plus today's date"""
+  return result_cache.make_key("stocks", {'company': " ".join(company.lower().split()), 'date': date.today().isoformat()})
+
+
+def print_team_analysis(company):
+  """Run the selected team on company, streaming its response to the terminal"""
+  selected, query = select_team(company)
+  selected.print_response(query, stream=True)
+
 
 def main():
   print("Welcome to the Stocks Assistant!")
   print("Type 'exit', 'quit', or 'q' to stop.\n")
 
+  cache = result_cache.open_result_cache()
+
   while True:
     try:
       user_query = input("Enter the company name you want to analyze: ").strip()
@@ -67,7 +147,13 @@ def main():
         continue
 
       print()  # Add spacing
-      team.print_response(user_query, stream=True)
+      with tracing.trace_run("stocks", company=user_query) as trace:
+        fanout.run_interactive(
+          lambda: run_analysis(user_query),
+          team=lambda: print_team_analysis(user_query),
+          cache=cache, cache_key=result_cache_key(user_query), ttl=RESULT_CACHE_TTL,
+        )
+      tracing.print_summary(trace)
       print("\n")  # Add spacing after response
 
     except KeyboardInterrupt:
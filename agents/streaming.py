@@ -0,0 +1,242 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+import fanout
+import session
+import tracing
+
+# Incremental output for team runs. Team and member runs are turned into one
+# stream of (event, data) pairs tagged with the member that produced them:
+# content tokens as they arrive, tool calls as they start and finish, members
+# finishing, and a final done. Producers feed a bounded queue, so a slow
+# consumer (a terminal or an SSE client) holds the run back instead of letting
+# output pile up in memory.
+
+QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+
+
+def event_payload(event):
+  """Convert an agno run event into (event_name, data) or None to skip it"""
+  kind = getattr(event, "event", "")
+  member = getattr(event, "agent_name", None)
+  if kind in ("TeamRunContent", "RunContent") and getattr(event, "content", None):
+    return ("content" if kind == "TeamRunContent" else "member_content"), {"member": member, "content": event.content}
+  if kind.endswith("ToolCallStarted") or kind.endswith("ToolCallCompleted"):
+    tool = getattr(event, "tool", None)
+    name = "tool_started" if kind.endswith("Started") else "tool_completed"
+    return name, {"member": member, "tool": getattr(tool, "tool_name", None)}
+  if kind == "RunCompleted":
+    return "member_done", {"member": member, "status": "ok"}
+  if kind == "RunError":
+    return "member_done", {"member": member, "status": "error"}
+  if kind == "TeamRunCompleted":
+    return "done", {"content": event.content}
+  if kind == "TeamRunError":
+    return "error", {"message": event.content or "team run failed"}
+  return None
+
+
+def iter_team_events(team, query, session_state=None):
+  """Run team and yield (event_name, data) pairs as the coordinator and members produce them"""
+  for event in team.run(query, stream=True, stream_events=True, stream_member_events=True, session_state=session_state):
+    payload = event_payload(event)
+    if payload is not None:
+      yield payload
+
+
+async def stream_team(team, query, session_state=None, run_context=None, maxsize=QUEUE_SIZE):
+  """Async iterator over iter_team_events, with the blocking run on the loop's default executor.
+
+  The worker blocks while the queue is full, so a slow consumer applies
+  backpressure to its run instead of buffering output without bound. If the
+  consumer stops iterating the worker stops consuming the run. The worker
+  inherits the caller's context (tracing, search scope); run_context is an
+  optional context manager factory entered around the run on the worker thread.
+  """
+  loop = asyncio.get_running_loop()
+  queue = asyncio.Queue(maxsize=maxsize)
+  cancelled = threading.Event()
+  finished = object()
+
+  def put(item):
+    while not cancelled.is_set():
+      try:
+        asyncio.run_coroutine_threadsafe(asyncio.wait_for(queue.put(item), 1), loop).result()
+        return
+      except asyncio.TimeoutError:
+        continue
+
+  def run():
+    try:
+      with run_context() if run_context else nullcontext():
+        for payload in iter_team_events(team, query, session_state):
+          if cancelled.is_set():
+            break
+          put(payload)
+    except Exception as e:
+      put(("error", {"message": str(e)}))
+    finally:
+      put(finished)
+
+  loop.run_in_executor(None, contextvars.copy_context().run, run)
+  try:
+    while True:
+      item = await queue.get()
+      if item is finished:
+        break
+      yield item
+  finally:
+    cancelled.set()
+
+
+async def stream_parallel(tasks, synthesizer, query, timeout=fanout.DEFAULT_MEMBER_TIMEOUT, session_state=None, run_context=None, maxsize=QUEUE_SIZE, budget=None):
+  """Streaming form of fanout.run_parallel: run {key: (agent, task)} concurrently, then synthesize.
+
+  Member events are interleaved in the order they are produced, and each
+  member ends with a member_done event carrying its status and seconds. The
+  synthesizer's tokens follow as content events and the stream ends with done.
+  Members the current session already ran on the same brief replay their
+  earlier output and end with reused=True. Members block on the bounded queue
+  while the consumer is behind, and that wait doesn't count against their
+  timeout. run_context is an optional context manager
+  factory entered around the whole run. Member results are compacted to
+  budget tokens each for the synthesizer (see fanout.build_synthesis_prompt).
+  """
+  queue = asyncio.Queue(maxsize=maxsize)
+  finished = object()
+  results = {}
+  memory = session.current()
+
+  async def run_member(key, agent, task):
+    reused = memory.reuse({key: (agent, task)}, session_state) if memory is not None else {}
+    if reused:
+      results[key] = reused[key]
+      await queue.put(("member_content", {"member": agent.name, "content": reused[key]["content"]}))
+      await queue.put(("member_done", {"member": agent.name, "status": "ok", "seconds": 0.0, "reused": True}))
+      return
+    start = time.perf_counter()
+    chunks = []
+
+    async def relay():
+      # The deadline covers the member's own run; time blocked on a slow consumer pushes it back
+      loop = asyncio.get_running_loop()
+      deadline = loop.time() + timeout
+      events = agent.arun(task, session_state=session_state, stream=True, stream_events=True).__aiter__()
+      while True:
+        try:
+          event = await asyncio.wait_for(events.__anext__(), deadline - loop.time())
+        except StopAsyncIteration:
+          return
+        if getattr(event, "event", "") == "RunCompleted":
+          tracing.record_run_output(event)
+          if isinstance(event.content, str):
+            chunks[:] = [event.content]
+          continue
+        if getattr(event, "event", "") in ("RunError", "RunCancelled"):
+          # agno ends a failed run with this event instead of raising
+          raise RuntimeError(event.content or "run failed")
+        payload = event_payload(event)
+        if payload is None:
+          continue
+        if payload[0] == "member_content":
+          chunks.append(payload[1]["content"])
+        blocked = loop.time()
+        await queue.put(payload)
+        deadline += loop.time() - blocked
+
+    try:
+      with tracing.span(agent.name, kind="member"):
+        await relay()
+      status, content = "ok", "".join(chunks)
+    except asyncio.TimeoutError:
+      status, content = "timeout", f"No response within {timeout:g}s."
+    except Exception as e:
+      status, content = "error", f"Failed: {e}"
+    seconds = round(time.perf_counter() - start, 3)
+    results[key] = {"name": agent.name, "status": status, "content": content, "seconds": seconds}
+    if memory is not None:
+      memory.remember(key, task, session_state, results[key])
+    await queue.put(("member_done", {"member": agent.name, "status": status, "seconds": seconds}))
+
+  async def synthesize():
+    report = ""
+    prompt = fanout.build_synthesis_prompt(query, {key: results[key] for key in tasks}, budget)
+    remembered = memory.reports.get(prompt) if memory is not None else None
+    if remembered is not None:
+      await queue.put(("content", {"member": None, "content": remembered}))
+      return remembered
+    with tracing.span(synthesizer.name, kind="member"):
+      async for event in synthesizer.arun(prompt, stream=True, stream_events=True):
+        kind = getattr(event, "event", "")
+        if kind == "RunContent" and event.content:
+          await queue.put(("content", {"member": None, "content": event.content}))
+        elif kind == "RunCompleted":
+          tracing.record_run_output(event)
+          report = event.content
+        elif kind in ("RunError", "RunCancelled"):
+          raise RuntimeError(f"{synthesizer.name} failed: {event.content or 'run failed'}")
+    if memory is not None and report and all(r["status"] == "ok" for r in results.values()):
+      memory.reports.set(prompt, report)
+    return report
+
+  async def run():
+    try:
+      await asyncio.gather(*(run_member(key, agent, task) for key, (agent, task) in tasks.items()))
+      await queue.put(("done", {"content": await synthesize()}))
+    except Exception as e:
+      await queue.put(("error", {"message": str(e)}))
+    await queue.put(finished)
+
+  # The producer task copies the context at creation, so run_context stays active inside it
+  with run_context() if run_context else nullcontext():
+    producer = asyncio.create_task(run())
+  try:
+    while True:
+      item = await queue.get()
+      if item is finished:
+        break
+      yield item
+  finally:
+    producer.cancel()
+
+
+async def print_events(events, raise_on_failure=False):
+  """Print a stream as it arrives, with tokens under a header per member. Returns the final report.
+
+  With raise_on_failure, a stream with an error or a failed member raises
+  fanout.RunFailed carrying the report instead, so callers can skip caching it.
+  """
+  current = None
+  report = ""
+  failed = []
+  async for name, data in events:
+    if name in ("content", "member_content"):
+      label = data["member"] if name == "member_content" else "Report"
+      if label != current:
+        print(f"\n\n--- {label} ---\n", flush=True)
+        current = label
+      print(data["content"], end="", flush=True)
+    elif name == "tool_started":
+      print(f"\n[{data['member'] or 'Team'}] calling {data['tool']}...", flush=True)
+      current = None
+    elif name == "member_done" and data.get("reused"):
+      print(f"\n[{data['member']}] reused from this session", flush=True)
+      current = None
+    elif name == "member_done" and "seconds" in data:
+      print(f"\n[{data['member']}] {data['status']} in {data['seconds']:.1f}s", flush=True)
+      current = None
+    elif name == "error":
+      print(f"\nError: {data['message']}", flush=True)
+      failed.append(data["message"])
+    elif name == "done":
+      report = data["content"] or ""
+    if name == "member_done" and data["status"] != "ok":
+      failed.append(data["member"])
+  print()
+  if raise_on_failure and failed:
+    raise fanout.RunFailed(report or "Failed: " + "; ".join(failed))
+  return report
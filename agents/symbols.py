@@ -0,0 +1,228 @@
+import argparse
+import bisect
+import csv
+import difflib
+import io
+import os
+import re
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+
+import clients
+
+# Local symbol index. Company and coin names are resolved to tickers and
+# CoinGecko ids from listing files instead of a model call or an ambiguous
+# `symbols=` query. Lookups try an exact symbol/name/id match, then a unique name
+# prefix, then a fuzzy name match; prefix and fuzzy matches need a distinctive
+# query (several words, or one uncommon word), anything else is a miss and the
+# caller falls back to its slower path. Small listings ship in data/; `python symbols.py
+# download` fetches full ones into SYMBOL_DATA_DIR.
+
+DATA_DIR = Path(os.getenv("SYMBOL_DATA_DIR") or Path(__file__).parent / "data")
+
+NASDAQ_LISTINGS = (
+  "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt",
+  "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt",
+)
+COINGECKO_MARKETS = "https://api.coingecko.com/api/v3/coins/markets"
+
+# Minimum difflib ratio for a fuzzy name match
+FUZZY_CUTOFF = 0.85
+
+# Words that don't distinguish one listing from another
+_NOISE = re.compile(
+  r"\b(the|inc|incorporated|corp|corporation|co|company|companies|ltd|limited|plc|sa|se|nv|ag|"
+  r"holdings?|group|common stock|capital stock|ordinary shares|american depositary shares)\b"
+)
+_SHARE_CLASS = re.compile(r"\bclass ([a-z])\b")
+
+# Single words too common in company names to pick one listing by prefix ("united", "american", ...)
+_GENERIC = frozenset(
+  "advanced american applied bank capital central china community digital energy financial first general global "
+  "great health home industries insurance interactive international life medical national new pacific resources "
+  "royal services solutions southern standard systems technologies technology trust united western world".split()
+)
+
+# Shortest single-word query accepted as a name prefix or fuzzy match
+MIN_PREFIX_LENGTH = 4
+
+Match = namedtuple("Match", "symbol name id how")
+
+
+def normalize(name):
+  """Index form of a name: lowercase, no punctuation or legal suffixes, share class kept last ("alphabet class c")"""
+  name = name.lower()
+  share_class = _SHARE_CLASS.search(name)
+  name = name.split(" - ")[0].replace("&", " and ")
+  name = re.sub(r"[^a-z0-9 ]+", " ", _SHARE_CLASS.sub(" ", name).replace(".com", "").replace("'", ""))
+  cleaned = " ".join(_NOISE.sub(" ", name).split()) or " ".join(name.split())
+  return f"{cleaned} class {share_class.group(1)}" if share_class else cleaned
+
+
+def unclassed(key):
+  """Normalized name without its share class ("alphabet class c" -> "alphabet")"""
+  return _SHARE_CLASS.sub("", key).strip()
+
+
+def distinctive(key):
+  """Whether a normalized query says enough to pick a listing by prefix or fuzzy match"""
+  return " " in key or (len(key) >= MIN_PREFIX_LENGTH and key not in _GENERIC)
+
+
+class SymbolIndex:
+  """Exact, prefix and fuzzy lookup over (symbol, name, id) listings.
+
+  Listings are given in priority order (e.g. by market cap): when two share a
+  symbol or a normalized name, the first one wins. A name with a share class
+  is also indexed without it, so "Alphabet" finds the first class listed and
+  "Alphabet class C" the C shares. Names are kept in one sorted list, so a
+  prefix lookup is a binary search.
+  """
+
+  def __init__(self, listings):
+    self.listings = []
+    self._symbols = {}
+    self._names = {}
+    self._ids = {}
+    for symbol, name, listing_id in listings:
+      i = len(self.listings)
+      self.listings.append((symbol, name, listing_id))
+      self._symbols.setdefault(symbol.lower(), i)
+      key = normalize(name)
+      self._names.setdefault(key, i)
+      self._names.setdefault(unclassed(key), i)
+      if listing_id:
+        self._ids.setdefault(listing_id.lower(), i)
+    self._sorted_names = sorted(self._names)
+    self._by_initial = {}
+    for key in self._sorted_names:
+      self._by_initial.setdefault(key[:1], []).append(key)
+
+  def __len__(self):
+    return len(self.listings)
+
+  def _match(self, i, how):
+    symbol, name, listing_id = self.listings[i]
+    return Match(symbol, name, listing_id, how)
+
+  def exact(self, query, names=True):
+    """Match query exactly against ids, names (unless names=False) and symbols, in that order"""
+    raw = query.strip().lower().lstrip("$")
+    key = normalize(query)
+    for table, lookup in ((self._ids, raw), (self._names if names else {}, key), (self._symbols, raw)):
+      if lookup in table:
+        return self._match(table[lookup], "exact")
+    return None
+
+  def prefix(self, query, limit=5):
+    """Listings whose normalized name starts with the query's whole words ("jpmorgan" -> "jpmorgan chase")"""
+    key = normalize(query)
+    if not key:
+      return []
+    found = []
+    for name in self._sorted_names[bisect.bisect_left(self._sorted_names, key):]:
+      if not name.startswith(key) or len(found) >= limit:
+        break
+      if (name == key or name[len(key)] == " ") and self._names[name] not in found:
+        found.append(self._names[name])
+    return [self._match(i, "prefix") for i in found]
+
+  def fuzzy(self, query, limit=5, cutoff=FUZZY_CUTOFF):
+    """Listings whose normalized name is close to the query (same first letter)"""
+    key = normalize(query)
+    candidates = self._by_initial.get(key[:1], [])
+    return [self._match(self._names[name], "fuzzy") for name in difflib.get_close_matches(key, candidates, limit, cutoff)]
+
+  def resolve(self, query, fuzzy=True):
+    """Return the single listing query refers to, or None when it is unknown, ambiguous or too generic to guess"""
+    if not query or not query.strip():
+      return None
+    match = self.exact(query)
+    if match is not None or not distinctive(normalize(query)):
+      return match
+    matches = self.prefix(query, limit=2)
+    if len(matches) == 1:
+      return matches[0]
+    if fuzzy and not matches:
+      matches = self.fuzzy(query, limit=2)
+      if len(matches) == 1:
+        return matches[0]
+    return None
+
+
+def _read_csv(path, columns):
+  with open(path, newline="", encoding="utf-8") as f:
+    return [tuple(row.get(c) or "" for c in columns) for row in csv.DictReader(f)]
+
+
+@lru_cache(maxsize=None)
+def stock_index():
+  """Index of stock listings from DATA_DIR/stocks.csv (symbol, name)"""
+  return SymbolIndex((symbol, name, "") for symbol, name in _read_csv(DATA_DIR / "stocks.csv", ("symbol", "name")))
+
+
+@lru_cache(maxsize=None)
+def coin_index():
+  """Index of CoinGecko coins from DATA_DIR/coins.csv (id, symbol, name), highest market cap first"""
+  return SymbolIndex((symbol, name, coin_id) for coin_id, symbol, name in _read_csv(DATA_DIR / "coins.csv", ("id", "symbol", "name")))
+
+
+def resolve_coin_id(token):
+  """CoinGecko id for a ticker, coin name or id, or None. Names only match exactly; a ticker maps to its largest coin."""
+  match = coin_index().exact(token)
+  return match.id if match is not None else None
+
+
+def download_stocks(path):
+  """Write every NASDAQ/NYSE listing (excluding test issues) to path as symbol,name CSV"""
+  rows = {}
+  for url in NASDAQ_LISTINGS:
+    text = clients.request("GET", url, timeout=30).text
+    reader = csv.DictReader(io.StringIO(text), delimiter="|")
+    for row in reader:
+      symbol = row.get("Symbol") or row.get("ACT Symbol") or ""
+      if not symbol or symbol.startswith("File Creation Time") or row.get("Test Issue") == "Y":
+        continue
+      rows.setdefault(symbol.replace(".", "-"), row.get("Security Name", ""))
+  with open(path, "w", newline="", encoding="utf-8") as f:
+    writer = csv.writer(f)
+    writer.writerow(("symbol", "name"))
+    writer.writerows(rows.items())
+  return len(rows)
+
+
+def download_coins(path, pages=4):
+  """Write the top pages * 250 CoinGecko coins by market cap to path as id,symbol,name CSV"""
+  headers = {"x-cg-demo-api-key": os.environ["COINGECKO_API_KEY"]} if os.getenv("COINGECKO_API_KEY") else None
+  rows = []
+  for page in range(1, pages + 1):
+    params = {"vs_currency": "usd", "order": "market_cap_desc", "per_page": 250, "page": page}
+    coins = clients.get_json(COINGECKO_MARKETS, params=params, headers=headers, provider="coingecko")
+    rows += [(coin["id"], coin["symbol"], coin["name"]) for coin in coins or []]
+    if len(coins or []) < 250:
+      break
+  with open(path, "w", newline="", encoding="utf-8") as f:
+    writer = csv.writer(f)
+    writer.writerow(("id", "symbol", "name"))
+    writer.writerows(rows)
+  return len(rows)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Symbol index for stock tickers and CoinGecko ids")
+  sub = parser.add_subparsers(dest="command", required=True)
+  download = sub.add_parser("download", help="fetch full listings into SYMBOL_DATA_DIR")
+  download.add_argument("--coin-pages", type=int, default=4, help="pages of 250 coins to fetch, by market cap")
+  lookup = sub.add_parser("lookup", help="resolve names or tickers")
+  lookup.add_argument("kind", choices=("stock", "coin"))
+  lookup.add_argument("queries", nargs="+")
+  args = parser.parse_args()
+  if args.command == "download":
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    print(f"stocks: {download_stocks(DATA_DIR / 'stocks.csv')} listings")
+    print(f"coins: {download_coins(DATA_DIR / 'coins.csv', args.coin_pages)} listings")
+  else:
+    index = stock_index() if args.kind == "stock" else coin_index()
+    for query in args.queries:
+      print(f"{query}: {index.resolve(query)}")
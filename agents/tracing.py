@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Lightweight run tracing. A trace_run() block collects spans for everything
+# that happens inside it: tool calls (via the agno tool_hook below), outbound
+# HTTP and search requests, cache hits and retries, and model token usage from
+# finished runs. Traces are appended to AGENT_TRACE_PATH as JSONL and can be
+# printed as a per-run summary table. With tracing off every helper is a no-op.
+# Model spans carry a cost when the model's price is known (see routing.py).
+
+TRACE_PATH = os.getenv("AGENT_TRACE_PATH")
+ENABLED = bool(TRACE_PATH or os.getenv("AGENT_TRACE"))
+
+SUMMARY_FIELDS = ("retries", "rate_limited", "wait_ms", "cache_hits", "cache_misses", "bytes", "input_tokens", "output_tokens", "tokens_saved", "cost_usd")
+
+# model id -> (USD per 1M input tokens, USD per 1M output tokens)
+PRICES = {}
+
+_trace = ContextVar("trace", default=None)
+_span = ContextVar("span", default=None)
+_export_lock = threading.Lock()
+
+
+class Trace:
+  """Spans recorded during one team run"""
+
+  def __init__(self, name, **attrs):
+    self.id = uuid.uuid4().hex
+    self.name = name
+    self.attrs = attrs
+    self.spans = []
+    self._lock = threading.Lock()
+
+  def add(self, record):
+    with self._lock:
+      self.spans.append(record)
+
+  def summary(self):
+    """Aggregate spans by (kind, name): calls, total/max wall time and summed counters"""
+    rows = {}
+    with self._lock:
+      spans = list(self.spans)
+    for record in spans:
+      row = rows.setdefault((record["kind"], record["name"]), {
+        "kind": record["kind"], "name": record["name"], "calls": 0, "errors": 0,
+        "total_ms": 0.0, "max_ms": 0.0, **{field: 0 for field in SUMMARY_FIELDS},
+      })
+      row["calls"] += 1
+      row["errors"] += 1 if record.get("error") else 0
+      row["total_ms"] += record["ms"]
+      row["max_ms"] = max(row["max_ms"], record["ms"])
+      for field in SUMMARY_FIELDS:
+        row[field] += record["attrs"].get(field) or 0
+    return sorted(rows.values(), key=lambda row: -row["total_ms"])
+
+
+@contextmanager
+def trace_run(name, **attrs):
+  """Trace everything inside the block as one run; yields the Trace (None when tracing is off)"""
+  if not ENABLED:
+    yield None
+    return
+  trace = Trace(name, **attrs)
+  token = _trace.set(trace)
+  try:
+    with span(name, kind="run", **attrs):
+      yield trace
+  finally:
+    _trace.reset(token)
+    export(trace)
+
+
+@contextmanager
+def span(name, kind="tool", **attrs):
+  """Record wall time, attributes and any error for the block as a span of the current trace"""
+  trace = _trace.get()
+  if trace is None:
+    yield None
+    return
+  parent = _span.get()
+  record = {
+    "trace_id": trace.id,
+    "span_id": uuid.uuid4().hex[:16],
+    "parent_id": parent["span_id"] if parent else None,
+    "kind": kind,
+    "name": name,
+    "start": time.time(),
+    "attrs": dict(attrs),
+  }
+  token = _span.set(record)
+  started = time.perf_counter()
+  try:
+    yield record
+  except BaseException as e:
+    record["error"] = repr(e)
+    raise
+  finally:
+    record["ms"] = round((time.perf_counter() - started) * 1000, 3)
+    _span.reset(token)
+    trace.add(record)
+
+
+def annotate(**attrs):
+  """Set attributes on the current span"""
+  record = _span.get()
+  if record is not None:
+    record["attrs"].update(attrs)
+
+
+def incr(key, n=1):
+  """Add n to a counter attribute on the current span"""
+  record = _span.get()
+  if record is not None and n:
+    record["attrs"][key] = record["attrs"].get(key, 0) + n
+
+
+def tool_hook(function_name, function_call, arguments):
+  """agno tool hook: run every tool call inside a span and record the size of its result"""
+  with span(function_name, kind="tool") as record:
+    result = function_call(**arguments)
+    if record is not None and isinstance(result, (str, bytes)):
+      record["attrs"]["bytes"] = len(result)
+    return result
+
+
+def set_prices(prices):
+  """Register {model_id: (input, output)} prices in USD per 1M tokens"""
+  PRICES.update(prices)
+
+
+def model_cost(model_id, input_tokens, output_tokens):
+  """USD cost of a model call, or 0.0 when the model has no registered price"""
+  price = PRICES.get(model_id)
+  if price is None:
+    return 0.0
+  return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+
+def record_run_output(run_output):
+  """Record model token usage for a finished agent/team run and its member runs"""
+  trace = _trace.get()
+  if trace is None or run_output is None:
+    return
+  metrics = getattr(run_output, "metrics", None)
+  duration = getattr(metrics, "duration", None)
+  model_id = getattr(run_output, "model", None)
+  input_tokens = getattr(metrics, "input_tokens", 0) or 0
+  output_tokens = getattr(metrics, "output_tokens", 0) or 0
+  name = getattr(run_output, "agent_name", None) or getattr(run_output, "team_name", None) or "run"
+  trace.add({
+    "trace_id": trace.id,
+    "span_id": uuid.uuid4().hex[:16],
+    "parent_id": None,
+    "kind": "model",
+    "name": name,
+    "start": getattr(run_output, "created_at", None),
+    "ms": round(duration * 1000, 3) if duration else 0.0,
+    "attrs": {
+      "model": model_id,
+      "input_tokens": input_tokens,
+      "output_tokens": output_tokens,
+      "cost_usd": round(model_cost(model_id, input_tokens, output_tokens), 6),
+    },
+  })
+  for member_output in getattr(run_output, "member_responses", None) or []:
+    record_run_output(member_output)
+
+
+def run_hook(run_output):
+  """agno team post_hook: record token usage once the team run finishes"""
+  record_run_output(run_output)
+
+
+def export(trace):
+  """Append the trace's spans to AGENT_TRACE_PATH as JSON lines"""
+  if not TRACE_PATH:
+    return
+  with trace._lock:
+    lines = [json.dumps({"run": trace.name, **record}, default=str) for record in trace.spans]
+  with _export_lock, open(TRACE_PATH, "a") as f:
+    f.write("\n".join(lines) + "\n")
+
+
+def format_summary(trace):
+  """Render a trace's summary as a plain-text table"""
+  columns = ("kind", "name", "calls", "errors", "total_ms", "max_ms") + SUMMARY_FIELDS
+  rows = [[str(round(row[c], 4 if c == "cost_usd" else 1)) if isinstance(row[c], float) else str(row[c]) for c in columns]
+          for row in trace.summary()]
+  widths = [max(len(c), *(len(r[i]) for r in rows)) if rows else len(c) for i, c in enumerate(columns)]
+  lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+  lines += ["  ".join(v.ljust(w) for v, w in zip(row, widths)) for row in rows]
+  return f"Trace {trace.name} ({trace.id})\n" + "\n".join(lines)
+
+
+def print_summary(trace):
+  """Print a trace's summary table (no-op when tracing is off)"""
+  if trace is not None:
+    print(format_summary(trace))
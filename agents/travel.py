@@ -1,13 +1,26 @@
+import argparse
+import asyncio
+from datetime import date
 from typing import Iterator
 from dotenv import load_dotenv
-from agno.agent import Agent
-from agno.team import Team
-from agno.models.xai import xAI
-from agno.tools.duckduckgo import DuckDuckGoTools
+import compaction
+import fanout
+import ratelimit
+import registry
+import result_cache
+import routing
+import search
+import session
+import streaming
+import tracing
 
 # Load environment variables from .env file
 load_dotenv()
 
+# DuckDuckGoTools results (weather, events) are news-like, so follow-ups reuse them only as long as searches are cached
+session.limit_tool_ttl("web_search", search.search_cache.ttl)
+session.limit_tool_ttl("search_news", search.search_cache.ttl)
+
 def collect_trip_details():
   """Collect trip details through multi-step questions"""
   trip_details = {}
@@ -38,22 +51,14 @@ def collect_trip_details():
   return trip_details
 
 
-def build_agent_details(trip_details, agent_name):
-  """Get the details for a specific agent"""
-  destination = trip_details['destination']
-  transport_mode = trip_details['transport_mode']
-  days = trip_details['days']
-  description = trip_details['description']
-
-  if agent_name == "travel_agent":
-    details = f"""I'm planning a trip to {destination} for {days} days. /n/n
-    Transportation: {transport_mode} /n/n
-    Activities I'm interested in: {description} /n/n"""
-
-    if 'departure_city' in trip_details:
-      details += f" from {trip_details['departure_city']}"
+# Per-agent task briefs, defined once at import and filled in with the collected
+# trip details before a run. Each brief reaches its member through session_state
+# (member instructions reference {<agent_name>_brief}), so members don't spend a
+# model turn working out their task and the coordinator never has to relay it.
+AGENT_TEMPLATES = {
+  "travel_agent": """I'm planning a trip to {destination} for {days} days.
 
-    details += f"""
+    Transportation: {transport_mode}{departure}
 
     Activities I'm interested in: {description}
 
@@ -61,65 +66,187 @@ def build_agent_details(trip_details, agent_name):
     - Best time to travel
     - Estimated flight costs (if applicable)
     - Recommended return dates
-    - Any travel tips specific to my interests"""
-
-    return details
-
-  elif agent_name == "weather_agent":
-    return f"What's the weather like in {destination} and what's the best time to visit for {description}?"
-
-  elif agent_name == "events_agent":
-    return f"Find events in {destination} related to: {description}. I'll be there for {days} days."
-
-  return None
-
-weather_agent = Agent(
-  name="Weather agent",
-  tools=[DuckDuckGoTools()],
-  role="Get the weather of a certain City",
-  instructions=[
-    "FIRST: use the build_agent_details function to feed the weather agent with the trip details, and use it to get the weather recommendations.",
-    "Use the function like this: build_agent_details(trip_details, 'weather_agent')",
-  ],
-  markdown=True,
-)
-
-travel_agent = Agent(
-  name="Travel agent",
-  role="Plan a trip to a given destination",
-  instructions=[
-    "FIRST: use the build_agent_details function to get the trip details for the travel agent, and use it to get the travel recommendations. build_agent_details(trip_details, 'travel_agent')",
-    "SECOND: use the function response to get the travel recommendations, and use it to plan a trip to the destination.",
-  ],
-  model=xAI(id="grok-3"),
-  markdown=True,
-)
-
-events_agent = Agent(
-  name="Events agent",
-  role="Find events in a given destination",
-  model=xAI(id="grok-3"),
-  instructions=["Use the build_agent_details function to get the trip details for the events agent, and use it to get the events recommendations. build_agent_details(trip_details, 'events_agent')"],
-  markdown=True,
-)
-
-team = Team(
-  members=[weather_agent, travel_agent, events_agent],
-  model=xAI(id="grok-3"),
-  instructions=[
-    "You are a team of agents that are tasked with planning a trip to a given destination.",
-    "Use the build_agent_details function to get specific details for each agent.",
-    "Coordinate between weather, travel, and events agents to provide a comprehensive trip plan."
-  ],
-  markdown=True,
-  show_members_responses=True,
-)
-
-
-def main():
+    - Any travel tips specific to my interests""",
+
+  "weather_agent": "What's the weather like in {destination} and what's the best time to visit for {description}?",
+
+  "events_agent": "Find events in {destination} related to: {description}. I'll be there for {days} days.",
+}
+
+
+def build_agent_details(trip_details, agent_name):
+  """Get the details for a specific agent"""
+  template = AGENT_TEMPLATES.get(agent_name)
+  if template is None:
+    return None
+  departure_city = trip_details.get('departure_city')
+  return template.format(
+    destination=trip_details['destination'],
+    transport_mode=trip_details['transport_mode'],
+    departure=f" from {departure_city}" if departure_city else "",
+    days=trip_details['days'],
+    description=trip_details['description'],
+  )
+
+
+def build_agent_briefs(trip_details):
+  """Build every member's task brief up front: {agent_name: brief}"""
+  return {agent_name: build_agent_details(trip_details, agent_name) for agent_name in AGENT_TEMPLATES}
+
+
+@registry.factory("travel.weather_agent")
+def build_weather_agent():
+  from agno.agent import Agent
+  from agno.tools.duckduckgo import DuckDuckGoTools
+  return Agent(
+    name="Weather agent",
+    tools=[DuckDuckGoTools()],
+    tool_hooks=[tracing.tool_hook, session.tool_hook, ratelimit.tool_hook],
+    **routing.route("travel.weather_agent"),
+    role="Get the weather of a certain City",
+    instructions=[
+      "Task brief:\n{weather_agent_brief}",
+      "Use the DuckDuckGoTools to search the web for the weather and give weather recommendations for the trip.",
+    ],
+    markdown=True,
+  )
+
+
+@registry.factory("travel.travel_agent")
+def build_travel_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Travel agent",
+    role="Plan a trip to a given destination",
+    instructions=[
+      "Task brief:\n{travel_agent_brief}",
+      "Use the brief to give travel recommendations and plan a trip to the destination.",
+    ],
+    **routing.route("travel.travel_agent"),
+    markdown=True,
+  )
+
+
+@registry.factory("travel.events_agent")
+def build_events_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Events agent",
+    role="Find events in a given destination",
+    **routing.route("travel.events_agent"),
+    instructions=[
+      "Task brief:\n{events_agent_brief}",
+      "Use the brief to give events recommendations.",
+    ],
+    markdown=True,
+  )
+
+
+@registry.factory("travel.team")
+def build_team():
+  from agno.team import Team
+  return Team(
+    members=list(registry.get("travel.members").values()),
+    **routing.route("travel.coordinator"),
+    instructions=[
+      "You are a team of agents that are tasked with planning a trip to a given destination.",
+      "Each member already has its own task brief; delegate to every member with a short task, without restating the details.",
+      "Coordinate between weather, travel, and events agents to provide a comprehensive trip plan."
+    ],
+    markdown=True,
+    post_hooks=[tracing.run_hook],
+    show_members_responses=True,
+    compression_manager=compaction.manager("travel"),
+  )
+
+
+# With --parallel, merges the weather, travel and events results into one plan (see fanout.run_parallel)
+@registry.factory("travel.synthesis_agent")
+def build_synthesis_agent():
+  from agno.agent import Agent
+  return Agent(
+    name="Synthesis agent",
+    role="Combine member results into one trip plan",
+    **routing.route("travel.synthesis_agent"),
+    instructions=[
+      "You receive the weather, travel, and events results for the trip.",
+      "Produce a comprehensive trip plan from them. Only use the information provided.",
+    ],
+    markdown=True,
+  )
+
+
+@registry.factory("travel.members")
+def build_members():
+  """{agent_name: member} in the order the team and the parallel fan-out use"""
+  return {name: registry.get(f"travel.{name}") for name in ("weather_agent", "travel_agent", "events_agent")}
+
+
+# Agents, teams and members are module attributes too (travel.team), built on first access
+__getattr__ = registry.module_getattr("travel")
+
+
+def build_team_query(trip_details):
+  """Build the team request for the collected trip details"""
+  return f"""Plan a comprehensive trip with the following details:
+      - Destination: {trip_details['destination']}
+      - Duration: {trip_details['days']} days
+      - Transportation: {trip_details['transport_mode']}
+      {f"- Departing from: {trip_details['departure_city']}" if 'departure_city' in trip_details else ''}
+      - Activities/Interests: {trip_details['description']}
+
+      Please coordinate with all agents to provide weather info, travel recommendations, and events."""
+
+
+async def run_parallel_plan(trip_details, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT):
+  """Run all members concurrently on their briefs, then synthesize. Returns (member_results, plan)."""
+  tasks = {key: (agent, fanout.MEMBER_TASK) for key, agent in registry.get("travel.members").items()}
+  session_state = fanout.brief_session_state(build_agent_briefs(trip_details))
+  return await fanout.run_parallel(tasks, registry.get("travel.synthesis_agent"), build_team_query(trip_details), member_timeout, session_state, compaction.member_budget("travel"))
+
+
+def stream_plan(trip_details, parallel=False, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT):
+  """Async iterator of (event, data) pairs for a trip plan, with each member's output as it is produced"""
+  session_state = fanout.brief_session_state(build_agent_briefs(trip_details))
+  query = build_team_query(trip_details)
+  if parallel:
+    tasks = {key: (agent, fanout.MEMBER_TASK) for key, agent in registry.get("travel.members").items()}
+    return streaming.stream_parallel(tasks, registry.get("travel.synthesis_agent"), query, member_timeout, session_state, budget=compaction.member_budget("travel"))
+  return streaming.stream_team(registry.get("travel.team"), query, session_state)
+
+
+# Trip plans change slowly (weather and events), so cached plans last a few hours
+RESULT_CACHE_TTL = 6 * 60 * 60
+
+
+def result_cache_key(trip_details):
+  """Result cache key: normalized trip details plus today's date"""
+  normalized = {key: " ".join(str(value).lower().split()) for key, value in trip_details.items()}
+  return result_cache.make_key("travel", {**normalized, 'date': date.today().isoformat()})
+
+
+def run_plan(trip_details, parallel=False, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT):
+  """Plan a trip without printing and return the plan; raises fanout.RunFailed if it failed"""
+  if parallel:
+    return fanout.checked_report(*asyncio.run(run_parallel_plan(trip_details, member_timeout)))
+  session_state = fanout.brief_session_state(build_agent_briefs(trip_details))
+  return fanout.checked_content(registry.get("travel.team").run(build_team_query(trip_details), session_state=session_state))
+
+
+def print_team_plan(trip_details):
+  """Run the team on trip_details, streaming the coordinator's response to the terminal"""
+  session_state = fanout.brief_session_state(build_agent_briefs(trip_details))
+  registry.get("travel.team").print_response(build_team_query(trip_details), stream=True, session_state=session_state)
+
+
+def main(parallel=False, member_timeout=fanout.DEFAULT_MEMBER_TIMEOUT, stream=False):
   print("Welcome to the Travel Planning Assistant!")
   print("Type 'exit', 'quit', or 'q' at any prompt to stop.\n")
 
+  cache = result_cache.open_result_cache()
+  # Follow-ups in this loop reuse unchanged member results and repeated tool calls
+  memory = session.open_session_memory()
+
   while True:
     try:
       # Collect all trip details
@@ -140,20 +267,17 @@ def main():
       print(f"Activities: {trip_details['description']}")
       print("="*50 + "\n")
 
-      # Build the query with trip details
-      query = f"""Plan a comprehensive trip with the following details:
-      - Destination: {trip_details['destination']}
-      - Duration: {trip_details['days']} days
-      - Transportation: {trip_details['transport_mode']}
-      {f"- Departing from: {trip_details['departure_city']}" if 'departure_city' in trip_details else ''}
-      - Activities/Interests: {trip_details['description']}
-
-      Please coordinate with all agents to provide weather info, travel recommendations, and events."""
-
       print("Getting travel recommendations...\n")
 
-      # Call the team and wait for complete response
-      team.print_response(query, stream=True)
+      with tracing.trace_run("travel", **trip_details) as trace, session.use(memory):
+        fanout.run_interactive(
+          lambda: run_plan(trip_details, parallel, member_timeout),
+          stream=stream and (lambda: stream_plan(trip_details, parallel, member_timeout)),
+          parallel=parallel and (lambda: run_parallel_plan(trip_details, member_timeout)),
+          team=lambda: print_team_plan(trip_details),
+          cache=cache, cache_key=result_cache_key(trip_details), ttl=RESULT_CACHE_TTL,
+        )
+      tracing.print_summary(trace)
 
       print("\n" + "="*50 + "\n")
 
@@ -171,4 +295,9 @@ def main():
       break
 
 if __name__ == "__main__":
-  main()
\ No newline at end of file
+  parser = argparse.ArgumentParser(description="Travel Planning Assistant")
+  parser.add_argument("--parallel", action="store_true", help="run all members concurrently, then synthesize")
+  parser.add_argument("--member-timeout", type=float, default=fanout.DEFAULT_MEMBER_TIMEOUT, help="seconds to wait for each member in --parallel mode")
+  parser.add_argument("--stream", action="store_true", help="print each member's output and tool calls as they are produced")
+  args = parser.parse_args()
+  main(parallel=args.parallel, member_timeout=args.member_timeout, stream=args.stream)
\ No newline at end of file